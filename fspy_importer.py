@@ -4,18 +4,81 @@ PLUGIN_LABEL = "fSpy Importer"
 PLUGIN_INITIAL_WIDTH = 500
 PLUGIN_INITIAL_HEIGHT = 500
 
-# デバッグ設定
-DEBUG_LEVELS = {
-    'trace': False,
-    'debug': False,
-    'info': True,
-    'error': True
+# カメラのフィルムバック設定
+HORIZONTAL_APERTURE_MM = 36.0  # 35mmフィルム規格
+MM_TO_INCH = 0.0393701
+FILM_FIT_HORIZONTAL = 1
+FILM_FIT_NAMES = {0: "fill", 1: "horizontal", 2: "vertical", 3: "overscan"}
+
+# Maya の rotateOrder 属性の並び順
+ROTATE_ORDERS = ("xyz", "yzx", "zxy", "xzy", "yxz", "zyx")
+DEFAULT_ROTATE_ORDER = "xyz"
+
+# リグ生成のバックエンド ("cmds" または "openmaya")
+DEFAULT_RIG_BACKEND = "cmds"
+
+# 対応している fSpy プロジェクトファイルのバージョン
+FSPY_SUPPORTED_VERSIONS = (1,)
+
+# 解析結果キャッシュの上限（エントリ数と状態データの合計バイト数）
+PARSE_CACHE_MAX_ENTRIES = 128
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# カメラインデックスのファイル名（Mayaプロジェクトの data フォルダに作成）
+INDEX_FILENAME = "fspy_index.sqlite"
+
+# ヘッダーと同時に先読みする状態データのサイズ（バイト）
+STATE_PREFETCH_SIZE = 64 * 1024
+
+# イメージプレーン用プロキシ画像の縮小率
+PROXY_SCALES = {"full": 1.0, "half": 0.5, "quarter": 0.25}
+
+# 書き出した画像のハッシュを記録するファイル名（画像フォルダに作成）
+PLATE_REGISTRY_FILENAME = ".fspy_plates.json"
+
+# アップ軸・オフセット変更の反映を待つ時間（ミリ秒）
+UP_AXIS_DEBOUNCE_MS = 50
+# この時間変更がなければ一連の変更を1回のアンドゥとして確定する（ミリ秒）
+UP_AXIS_UNDO_IDLE_MS = 500
+
+# fSpy で生成したリグのグループに付けるタグ属性と、タグがない古いリグの名前
+RIG_TAG_ATTR = "fspyRig"
+RIG_GROUP_NAME = "fspy_camera_group"
+# 再インポート用にリグへ記録するソースのパスと内容のハッシュ
+RIG_SOURCE_ATTR = "fspySourcePath"
+RIG_STATE_HASH_ATTR = "fspyStateHash"
+RIG_PLATE_HASH_ATTR = "fspyPlateHash"
+
+# 監視中の .fspy ファイルが変更されてから再読み込みするまでの待ち時間（ミリ秒）
+# fSpy の保存途中のファイルを読まないよう、この間に変更が続く場合は待ち直す
+FILE_WATCH_DEBOUNCE_MS = 500
+
+# 画像書き出し時のチャンクサイズ（バイト）
+IMAGE_COPY_CHUNK_SIZE = 1024 * 1024
+
+# ログ設定
+TRACE = 5  # logging.DEBUG より詳細なトレースログ
+LOG_LEVELS = {
+    'trace': TRACE,
+    'debug': 10,  # logging.DEBUG
+    'info': 20,  # logging.INFO
+    'error': 40  # logging.ERROR
 }
+# ログに出力する大きなデータ（JSONなど）の最大文字数
+LOG_PAYLOAD_LIMIT = 500
 
 import maya.cmds as cmds
 import struct
 import os
 import math
+import time
+import sys
+import concurrent.futures
+import threading
+import hashlib
+import sqlite3
+import types
+from collections import OrderedDict
 
 # numpy の条件付きインポート
 try:
@@ -26,41 +89,155 @@ except ImportError:
     print('['+PLUGIN_NAME+'] Numpy not found, using fallback implementation.')
 
 import json
+import logging
 
+# orjson の条件付きインポート（高速なJSONデコード）
+try:
+    import orjson
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
+
+# Qt の条件付きインポート（Qt がない環境でも解析とカメラの計算は利用できる）
 try:
     from PySide2 import QtWidgets, QtCore, QtGui
     from shiboken2 import wrapInstance
+    USE_QT = True
 except ImportError:
-    from PySide6 import QtWidgets, QtCore, QtGui
-    from shiboken6 import wrapInstance
+    try:
+        from PySide6 import QtWidgets, QtCore, QtGui
+        from shiboken6 import wrapInstance
+        USE_QT = True
+    except ImportError:
+        USE_QT = False
+
+if not USE_QT:
+    class _QtUnavailable(object):
+        """Qt がない場合に UI 関連のクラス定義を通すための基底クラス（生成すると例外）"""
+        def __init__(self, *args, **kwargs):
+            raise ImportError("PySide2 or PySide6 is required for this feature")
+
+    QtCore = types.SimpleNamespace(QObject=_QtUnavailable, QRunnable=_QtUnavailable, Signal=lambda *args: None)
+    QtWidgets = types.SimpleNamespace(QDialog=_QtUnavailable)
+    QtGui = wrapInstance = None
+
 
 
+logging.addLevelName(TRACE, "TRACE")
+logger = logging.getLogger(PLUGIN_NAME)
+if not logger.handlers:
+    # Maya のスクリプトエディタに従来と同じ形式で出力する
+    _log_handler = logging.StreamHandler(sys.stdout)
+    _log_handler.setFormatter(logging.Formatter('[' + PLUGIN_NAME + '] [%(levelname)s]: %(message)s'))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
+    logger.setLevel(LOG_LEVELS['info'])
+
+
+class LogPayload:
+    """ログ出力時にのみ文字列化し、長い場合は切り詰めるラッパー"""
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        limit = self.limit or LOG_PAYLOAD_LIMIT
+        text = str(self.value)
+        if len(text) > limit:
+            return f"{text[:limit]}... ({len(text)} chars, truncated)"
+        return text
+
 
 class Matrix3x3:
-    """numpy が利用できない場合の3x3行列実装"""
+    """numpy が利用できない場合の3x3行列実装（行優先のフラットなタプルで保持）"""
+    __slots__ = ('m',)
+
     def __init__(self, data):
-        self.data = [[data[i][j] for j in range(3)] for i in range(3)]
-    
+        # ネストしたリスト、または9要素のフラットなシーケンスを受け付ける
+        if len(data) == 9:
+            self.m = tuple(data)
+        else:
+            (m00, m01, m02), (m10, m11, m12), (m20, m21, m22) = data
+            self.m = (m00, m01, m02, m10, m11, m12, m20, m21, m22)
+
+    @classmethod
+    def _from_flat(cls, m):
+        """フラットなタプルから中間リストを作らずに生成する"""
+        matrix = cls.__new__(cls)
+        matrix.m = m
+        return matrix
+
+    @property
+    def data(self):
+        """行ごとのタプルとして返す"""
+        m = self.m
+        return ((m[0], m[1], m[2]), (m[3], m[4], m[5]), (m[6], m[7], m[8]))
+
     def __getitem__(self, key):
         i, j = key
-        return self.data[i][j]
-    
-    @staticmethod
-    def dot_product(a, b):
-        """ベクトルの内積"""
-        return sum(x * y for x, y in zip(a, b))
+        return self.m[i * 3 + j]
+
+    def __repr__(self):
+        return f"Matrix3x3({[list(row) for row in self.data]})"
     
     def dot(self, other):
         """行列の積"""
-        result = [[0 for _ in range(3)] for _ in range(3)]
-        for i in range(3):
-            for j in range(3):
-                row = [self.data[i][k] for k in range(3)]
-                col = [other.data[k][j] for k in range(3)]
-                result[i][j] = self.dot_product(row, col)
-        return Matrix3x3(result)
-
-def create_rotation_matrix(x, y, z):
+        a00, a01, a02, a10, a11, a12, a20, a21, a22 = self.m
+        b00, b01, b02, b10, b11, b12, b20, b21, b22 = other.m
+        return self._from_flat((
+            a00 * b00 + a01 * b10 + a02 * b20,
+            a00 * b01 + a01 * b11 + a02 * b21,
+            a00 * b02 + a01 * b12 + a02 * b22,
+            a10 * b00 + a11 * b10 + a12 * b20,
+            a10 * b01 + a11 * b11 + a12 * b21,
+            a10 * b02 + a11 * b12 + a12 * b22,
+            a20 * b00 + a21 * b10 + a22 * b20,
+            a20 * b01 + a21 * b11 + a22 * b21,
+            a20 * b02 + a21 * b12 + a22 * b22,
+        ))
+
+    def transpose(self):
+        """転置行列"""
+        m00, m01, m02, m10, m11, m12, m20, m21, m22 = self.m
+        return self._from_flat((m00, m10, m20, m01, m11, m21, m02, m12, m22))
+
+    def inverse(self):
+        """逆行列（余因子展開）"""
+        a00, a01, a02, a10, a11, a12, a20, a21, a22 = self.m
+        c00 = a11 * a22 - a12 * a21
+        c01 = a12 * a20 - a10 * a22
+        c02 = a10 * a21 - a11 * a20
+        det = a00 * c00 + a01 * c01 + a02 * c02
+        if abs(det) < 1e-12:
+            raise ValueError("Matrix is singular")
+        inv_det = 1.0 / det
+        return self._from_flat((
+            c00 * inv_det,
+            (a02 * a21 - a01 * a22) * inv_det,
+            (a01 * a12 - a02 * a11) * inv_det,
+            c01 * inv_det,
+            (a00 * a22 - a02 * a20) * inv_det,
+            (a02 * a10 - a00 * a12) * inv_det,
+            c02 * inv_det,
+            (a01 * a20 - a00 * a21) * inv_det,
+            (a00 * a11 - a01 * a10) * inv_det,
+        ))
+
+def _build_euler_table():
+    """回転順序ごとに (最初の軸, 2番目の軸, 最後の軸, 符号) のテーブルを作る"""
+    table = {}
+    for order in ROTATE_ORDERS:
+        i, j, k = ("xyz".index(axis) for axis in order)
+        # 巡回順 (xyz, yzx, zxy) 以外は符号が反転する
+        sign = 1.0 if order in ("xyz", "yzx", "zxy") else -1.0
+        table[order] = (i, j, k, sign)
+    return table
+
+_EULER_TABLE = _build_euler_table()
+
+def create_rotation_matrix(x, y, z, rotate_order=DEFAULT_ROTATE_ORDER):
     """回転行列の生成（numpy非依存版）"""
     # X回転行列
     rot_x = [
@@ -83,95 +260,391 @@ def create_rotation_matrix(x, y, z):
         [0, 0, 1]
     ]
     
+    # 最初の軸の回転から順に適用する (R = R_k . R_j . R_i)
+    i, j, k, _ = _EULER_TABLE[rotate_order]
+    rotations = (rot_x, rot_y, rot_z)
     if USE_NUMPY:
-        return np.array(rot_z).dot(np.array(rot_y)).dot(np.array(rot_x))
+        return np.array(rotations[k]).dot(np.array(rotations[j])).dot(np.array(rotations[i]))
     else:
-        return Matrix3x3(rot_z).dot(Matrix3x3(rot_y)).dot(Matrix3x3(rot_x))
+        return Matrix3x3(rotations[k]).dot(Matrix3x3(rotations[j])).dot(Matrix3x3(rotations[i]))
+
+def rotation_matrix_to_euler(matrix, rotate_order=DEFAULT_ROTATE_ORDER):
+    """回転行列を指定した回転順序のオイラー角に変換する（常に [x, y, z] の順で返す）"""
+    i, j, k, sign = _EULER_TABLE[rotate_order]
+    # numpy 配列、Matrix3x3、リストのいずれも m[行][列] でアクセスする
+    m = matrix.data if isinstance(matrix, Matrix3x3) else matrix
+
+    euler = [0, 0, 0]
+    sy = math.sqrt(m[i][i] ** 2 + m[j][i] ** 2)
+    singular = sy < 1e-6
+    if not singular:
+        euler[i] = math.atan2(sign * m[k][j], m[k][k])
+        euler[k] = math.atan2(sign * m[j][i], m[i][i])
+    else:
+        euler[i] = math.atan2(-sign * m[j][k], m[j][j])
+    euler[j] = math.atan2(-sign * m[k][i], sy)
+    
+    # 常にリストとして返す
+    return [float(angle) for angle in euler]
 
-def rotation_matrix_to_euler(matrix):
-    """回転行列をオイラー角に変換する"""
+def rotation_matrices_to_euler(matrices, rotate_order=DEFAULT_ROTATE_ORDER):
+    """複数の回転行列 (N, 3, 3) をまとめてオイラー角 (N, 3) に変換する"""
+    i, j, k, sign = _EULER_TABLE[rotate_order]
     if USE_NUMPY:
-        # numpyが利用可能な場合
-        sy = math.sqrt(matrix[0, 0] ** 2 + matrix[1, 0] ** 2)
+        stack = np.asarray(matrices, dtype=float).reshape(-1, 3, 3)
+        sy = np.hypot(stack[:, i, i], stack[:, j, i])
         singular = sy < 1e-6
-        if not singular:
-            x = math.atan2(matrix[2, 1], matrix[2, 2])
-            y = math.atan2(-matrix[2, 0], sy)
-            z = math.atan2(matrix[1, 0], matrix[0, 0])
-        else:
-            x = math.atan2(-matrix[1, 2], matrix[1, 1])
-            y = math.atan2(-matrix[2, 0], sy)
-            z = 0
-    else:
-        # numpyが利用できない場合（Matrix3x3クラスを使用）
-        matrix_data = matrix.data if hasattr(matrix, 'data') else matrix
-        sy = math.sqrt(matrix_data[0][0] ** 2 + matrix_data[1][0] ** 2)
-        singular = sy < 1e-6
-        if not singular:
-            x = math.atan2(matrix_data[2][1], matrix_data[2][2])
-            y = math.atan2(-matrix_data[2][0], sy)
-            z = math.atan2(matrix_data[1][0], matrix_data[0][0])
+        euler = np.empty((stack.shape[0], 3))
+        # 特異点（ジンバルロック）の行はマスクで切り替える
+        euler[:, i] = np.where(
+            singular,
+            np.arctan2(-sign * stack[:, j, k], stack[:, j, j]),
+            np.arctan2(sign * stack[:, k, j], stack[:, k, k])
+        )
+        euler[:, j] = np.arctan2(-sign * stack[:, k, i], sy)
+        euler[:, k] = np.where(singular, 0.0, np.arctan2(sign * stack[:, j, i], stack[:, i, i]))
+        return euler
+
+    # numpyが利用できない場合（関数呼び出しを減らすためローカル変数に束縛）
+    atan2 = math.atan2
+    sqrt = math.sqrt
+    result = []
+    append = result.append
+    for matrix in matrices:
+        m = matrix.data if isinstance(matrix, Matrix3x3) else matrix
+        row_i, row_j, row_k = m[i], m[j], m[k]
+        sy = sqrt(row_i[i] * row_i[i] + row_j[i] * row_j[i])
+        euler = [0.0, 0.0, 0.0]
+        if sy < 1e-6:
+            euler[i] = atan2(-sign * row_j[k], row_j[j])
         else:
-            x = math.atan2(-matrix_data[1][2], matrix_data[1][1])
-            y = math.atan2(-matrix_data[2][0], sy)
-            z = 0
-    
-    # 常にリストとして返す
-    return [x, y, z]
+            euler[i] = atan2(sign * row_k[j], row_k[k])
+            euler[k] = atan2(sign * row_j[i], row_i[i])
+        euler[j] = atan2(-sign * row_k[i], sy)
+        append(euler)
+    return result
+
+def create_rotation_matrices(angles, rotate_order=DEFAULT_ROTATE_ORDER):
+    """複数のオイラー角 (N, 3)（ラジアン）からまとめて回転行列 (N, 3, 3) を生成する"""
+    i, j, k, _ = _EULER_TABLE[rotate_order]
+    if USE_NUMPY:
+        angles = np.asarray(angles, dtype=float).reshape(-1, 3)
+        c, s = np.cos(angles), np.sin(angles)
+        count = angles.shape[0]
+        rotations = np.zeros((3, count, 3, 3))
+        for axis in range(3):
+            # 回転軸以外の2軸で 2x2 の回転を組み立てる
+            a, b = (axis + 1) % 3, (axis + 2) % 3
+            rotations[axis, :, axis, axis] = 1.0
+            rotations[axis, :, a, a] = c[:, axis]
+            rotations[axis, :, a, b] = -s[:, axis]
+            rotations[axis, :, b, a] = s[:, axis]
+            rotations[axis, :, b, b] = c[:, axis]
+        return rotations[k] @ rotations[j] @ rotations[i]
+
+    # numpyが利用できない場合
+    return [create_rotation_matrix(x, y, z, rotate_order) for x, y, z in angles]
+
+def _build_up_axis_basis():
+    """アップ軸ごとの基底回転行列（各軸まわりに ±90 度）のテーブルを作る"""
+    table = {}
+    for sign, prefix in ((1.0, ""), (-1.0, "-")):
+        for index, axis in enumerate("XYZ"):
+            angles = [0.0, 0.0, 0.0]
+            angles[index] = sign * math.pi / 2
+            matrix = create_rotation_matrix(*angles)
+            rows = matrix.data if isinstance(matrix, Matrix3x3) else matrix.tolist()
+            # 90 度回転の成分は整数なので、丸めて誤差を取り除く
+            rows = [[float(round(value)) for value in row] for row in rows]
+            table[prefix + axis] = np.array(rows) if USE_NUMPY else Matrix3x3(rows)
+    return table
+
+# アップ軸名 -> 基底回転行列（別の軸の取り方はここに行列を追加するだけでよい）
+UP_AXIS_BASIS = _build_up_axis_basis()
+
+def compose_up_axis_rotations(up_axis, offsets, rotate_order=DEFAULT_ROTATE_ORDER):
+    """アップ軸の基底行列とオフセット（度, (N, 3)）を合成し、グループの回転（度, (N, 3)）を返す
+
+    合成は R = R(offset) . B(up_axis) で、全件を1回の行列演算で処理する。
+    """
+    basis = UP_AXIS_BASIS[up_axis]
+    if USE_NUMPY:
+        radians = np.radians(np.asarray(offsets, dtype=float).reshape(-1, 3))
+        composed = create_rotation_matrices(radians, rotate_order) @ basis
+        return np.degrees(rotation_matrices_to_euler(composed, rotate_order))
+
+    # numpyが利用できない場合
+    radians = [[math.radians(angle) for angle in offset] for offset in offsets]
+    composed = [matrix.dot(basis) for matrix in create_rotation_matrices(radians, rotate_order)]
+    return [[math.degrees(angle) for angle in euler]
+            for euler in rotation_matrices_to_euler(composed, rotate_order)]
+
+def compose_up_axis_rotation(up_axis, offset=(0.0, 0.0, 0.0), rotate_order=DEFAULT_ROTATE_ORDER):
+    """1つのリグについてアップ軸とオフセットを合成した回転（度）を返す"""
+    x, y, z = compose_up_axis_rotations(up_axis, [offset], rotate_order)[0]
+    return (float(x), float(y), float(z))
+
+class FSpyFormatError(ValueError):
+    """fSpy ファイルの形式が不正な場合の例外"""
+    pass
+
+def _read_region(f, prefix, offset, size):
+    """先読み済みのバッファを利用して、ファイルの指定範囲を読み込む
+
+    範囲が先読みに収まる場合はコピーせずにビューを返す。
+    f の位置は先読みの末尾にあることを前提とする。
+    """
+    view = memoryview(prefix)
+    if offset + size <= len(view):
+        return view[offset:offset + size]
+
+    buffer = bytearray(size)
+    target = memoryview(buffer)
+    # 先読みに含まれている部分をコピー
+    available = max(0, len(view) - offset)
+    target[:available] = view[offset:offset + available]
+    filled = available
+    if offset > len(view):
+        f.seek(offset)
+    while filled < size:
+        read = f.readinto(target[filled:])
+        if not read:
+            raise FSpyFormatError("Unexpected end of file")
+        filled += read
+    return buffer
+
+def _read_prefix(f, size, minimum):
+    """ファイルの先頭から最大 size バイトを読み込む
+
+    バッファリングしないファイルは NFS/SMB 上で要求より短く返ることがあるため、
+    少なくとも minimum バイトが揃うまで読み続ける。
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    filled = 0
+    while filled < minimum:
+        read = f.readinto(view[filled:])
+        if not read:
+            raise FSpyFormatError("Unexpected end of file while reading header")
+        filled += read
+    view.release()
+    del buffer[filled:]
+    return buffer
+
+def decode_state_data(buffer):
+    """末尾がヌル文字でパディングされた状態データ（JSON）をコピーせずにデコードする"""
+    view = memoryview(buffer)
+    # fSpy がヌル文字を書き込むのは末尾のパディングのみ
+    end = len(view)
+    while end > 0 and view[end - 1] == 0:
+        end -= 1
+    view = view[:end]
+
+    try:
+        if USE_ORJSON:
+            return orjson.loads(view)
+        return json.loads(str(view, 'utf-8'))
+    except ValueError as e:
+        # 壊れた JSON や UTF-8 も形式の不正として扱う
+        raise FSpyFormatError(f"Invalid state data: {e}") from e
 
 class FSpyParser:
-    def __init__(self, filepath):
+    # fspy(4) + version(4) + state_size(4) + image_size(4)
+    HEADER_SIZE = 16
+
+    def __init__(self, filepath, lazy=False):
         self.filepath = filepath
+        self.lazy = lazy  # True の場合、画像データは必要になるまで読み込まない
         self.state_data = None
-        self.image_data = None
+        self._image_data = None
+        self.image_offset = None  # ファイル先頭からの画像データの位置
+        self.image_size = 0
         self.image_path = None  # 保存された画像のパスを保持
+        self.error = None  # 解析に失敗した場合の例外（形式の不正は FSpyFormatError、読み込みの失敗は OSError）
+        self.cache_key = None  # 解析時のファイルの (realpath, mtime_ns, size)
+        self.image_hash = None  # 画像データの SHA-1（書き出し時に計算）
+
+    @property
+    def image_data(self):
+        """画像データ（遅延モードでは初回アクセス時に読み込む）"""
+        if self._image_data is None and self.has_image():
+            self._image_data = self.read_image()
+        return self._image_data
+
+    @image_data.setter
+    def image_data(self, value):
+        self._image_data = value
+
+    def has_image(self):
+        """画像データを含むかどうか（画像自体は読み込まない）"""
+        return bool(self._image_data) or (self.image_offset is not None and self.image_size > 0)
+
+    def read_image(self):
+        """ファイルから画像データのみを読み込んで返す"""
+        if self.image_offset is None or self.image_size <= 0:
+            return None
+        log_message("Reading image data: %d bytes at offset %d", "trace", self.image_size, self.image_offset)
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.image_offset)
+            image_data = f.read(self.image_size)
+        if len(image_data) != self.image_size:
+            raise ValueError("Unexpected end of file while reading image data")
+        return image_data
+
+    def write_image(self, file_path):
+        """画像データを .fspy ファイルから直接ストリーミングして書き出す
+
+        ハッシュが未計算の場合は、書き出しと同時に計算する。
+        """
+        digest = hashlib.sha1() if self.image_hash is None else None
+        if self._image_data:
+            # 読み込み済みの場合はそのまま書き出す
+            with open(file_path, 'wb') as dst:
+                dst.write(self._image_data)
+            if digest is not None:
+                digest.update(self._image_data)
+                self.image_hash = digest.hexdigest()
+            return
 
-    def parse(self):
+        if self.image_offset is None or self.image_size <= 0:
+            raise ValueError("No image data to write")
+
+        # 固定サイズのバッファを使い回し、画像全体をメモリに載せない
+        buffer = bytearray(min(IMAGE_COPY_CHUNK_SIZE, self.image_size))
+        view = memoryview(buffer)
+        remaining = self.image_size
+        with open(self.filepath, 'rb') as src, open(file_path, 'wb') as dst:
+            src.seek(self.image_offset)
+            while remaining > 0:
+                read = src.readinto(view[:min(len(buffer), remaining)])
+                if not read:
+                    raise ValueError("Unexpected end of file while reading image data")
+                dst.write(view[:read])
+                if digest is not None:
+                    digest.update(view[:read])
+                remaining -= read
+        if digest is not None:
+            self.image_hash = digest.hexdigest()
+        log_message("Streamed %d bytes of image data to: %s", "trace", self.image_size, file_path)
+
+    def compute_image_hash(self):
+        """画像データを書き出さずに SHA-1 を計算して返す（画像がない場合は None）"""
+        if self.image_hash is not None or not self.has_image():
+            return self.image_hash
+        digest = hashlib.sha1()
+        if self._image_data is not None:
+            digest.update(self._image_data)
+        else:
+            buffer = bytearray(min(IMAGE_COPY_CHUNK_SIZE, self.image_size))
+            view = memoryview(buffer)
+            remaining = self.image_size
+            with open(self.filepath, 'rb') as src:
+                src.seek(self.image_offset)
+                while remaining > 0:
+                    read = src.readinto(view[:min(len(buffer), remaining)])
+                    if not read:
+                        raise ValueError("Unexpected end of file while reading image data")
+                    digest.update(view[:read])
+                    remaining -= read
+        self.image_hash = digest.hexdigest()
+        return self.image_hash
+
+    def validate_header(self, file_id, version, state_size, image_size, file_size):
+        """ヘッダーの値をファイルサイズと照合し、不正な場合は FSpyFormatError を送出する"""
+        if file_id != b'fspy':
+            raise FSpyFormatError("Invalid fSpy file format")
+        if version not in FSPY_SUPPORTED_VERSIONS:
+            raise FSpyFormatError(f"Unsupported fSpy file version: {version}")
+        if state_size == 0:
+            raise FSpyFormatError("fSpy file has no state data")
+        expected_size = self.HEADER_SIZE + state_size + image_size
+        if expected_size > file_size:
+            raise FSpyFormatError(
+                f"Truncated or corrupted fSpy file: header declares {expected_size} bytes, "
+                f"file has {file_size} bytes"
+            )
+
+    def load_from_cache(self, entry, cache_key):
+        """キャッシュされた解析結果を読み込む"""
+        self.state_data = entry['state_data']
+        self.image_offset = entry['image_offset']
+        self.image_size = entry['image_size']
+        self._image_data = None
+        self.cache_key = cache_key
+        if not self.lazy:
+            self._image_data = self.read_image()
+
+    def open_file(self):
+        """解析用にファイルを開く"""
+        # 読み込み回数がそのままシステムコール回数になるようバッファリングしない
+        return open(self.filepath, 'rb', buffering=0)
+
+    def parse(self, use_cache=True):
+        self.error = None
         try:
+            if use_cache:
+                cache_key = ParseCache.make_key(self.filepath)
+                entry = parse_cache.get(cache_key)
+                if entry is not None:
+                    self.load_from_cache(entry, cache_key)
+                    log_message("Loaded fSpy file from cache: %s", "info", self.filepath)
+                    return True
+
             log_message("Opening fSpy file.", "trace")
-            with open(self.filepath, 'rb') as f:
-                # ヘッダーの検証
-                file_id = f.read(4)
-                log_message(f"File ID: {file_id}", "trace")
-                if file_id != b'fspy':
-                    raise ValueError("Invalid fSpy file format")
-
-                # バージョンとサイズの読み込み
-                version = struct.unpack('<I', f.read(4))[0]
-                log_message(f"Version: {version}", "trace")
-                state_size = struct.unpack('<I', f.read(4))[0]
-                log_message(f"State size: {state_size}", "trace")
-                image_size = struct.unpack('<I', f.read(4))[0]
-                log_message(f"Image size: {image_size}", "trace")
-
-                # JSONデータの読み込み
-                state_data = f.read(state_size)
-                log_message(f"Raw state data: {state_data[:100]}... (truncated)", "trace")
-                # ヌル文字を削除してデコード
-                state_data = state_data.replace(b'\x00', b'')
-                self.state_data = json.loads(state_data.decode('utf-8'))
-                log_message(f"Parsed JSON data: {self.state_data}", "trace")
-
-                # 画像データの読み込み
-                self.image_data = f.read(image_size)
-                log_message("Image data loaded successfully.", "trace")
-
-                log_message(f"Successfully parsed fSpy file: {self.filepath}", "info")
+            with self.open_file() as f:
+                file_stat = os.fstat(f.fileno())
+                self.cache_key = ParseCache.make_key(self.filepath, file_stat)
+                file_size = file_stat.st_size
+                if file_size < self.HEADER_SIZE:
+                    raise FSpyFormatError("Invalid fSpy file format")
+
+                # ヘッダーと状態データの先頭を1回の読み込みでまとめて取得する
+                prefix = _read_prefix(f, min(file_size, self.HEADER_SIZE + STATE_PREFETCH_SIZE), self.HEADER_SIZE)
+
+                # 大きなバッファを確保する前にヘッダーを検証する
+                file_id, version, state_size, image_size = struct.unpack_from('<4sIII', prefix)
+                log_message("File ID: %r", "trace", file_id)
+                log_message("Version: %d", "trace", version)
+                log_message("State size: %d", "trace", state_size)
+                log_message("Image size: %d", "trace", image_size)
+                self.validate_header(file_id, version, state_size, image_size, file_size)
+
+                # JSONデータの読み込み（先読みに収まらない場合のみ残りを読む）
+                state_data = _read_region(f, prefix, self.HEADER_SIZE, state_size)
+                log_message("Raw state data: %r", "trace", lambda: bytes(state_data[:100]))
+                self.state_data = decode_state_data(state_data)
+                log_message("Parsed JSON data: %s", "trace", LogPayload(self.state_data))
+
+                # 画像データの位置を記録
+                self.image_offset = self.HEADER_SIZE + state_size
+                self.image_size = image_size
+                self._image_data = None
+
+                if self.lazy:
+                    log_message("Lazy mode: image data will be loaded on demand.", "trace")
+                else:
+                    # 画像データの読み込み
+                    image_data = _read_region(f, prefix, self.image_offset, image_size)
+                    # 先読みバッファへのビューや bytearray は、従来どおり不変の bytes にする
+                    self._image_data = bytes(image_data)
+                    log_message("Image data loaded successfully.", "trace")
+
+                if use_cache:
+                    parse_cache.store(self)
+
+                log_message("Successfully parsed fSpy file: %s", "info", self.filepath)
                 return True
         except Exception as e:
-            log_message(f"Failed to parse fSpy file: {str(e)}", "error")
+            self.error = e
+            log_message("Failed to parse fSpy file: %s", "error", e)
             return False
 
-    def save_image(self, default_filename=None):
-        """画像データを保存し、保存されたパスを返す"""
-        if not self.image_data:
-            return None
-
+    def choose_image_path(self, default_filename=None):
+        """画像の保存先をダイアログで選択し、そのパスを返す（キャンセル時は None）"""
         if default_filename is None:
             default_filename = os.path.splitext(os.path.basename(self.filepath))[0] + ".png"
 
-        project_path = cmds.workspace(query=True, rootDirectory=True)
-        default_dir = os.path.join(project_path, "images")
+        default_dir = get_default_image_dir()
 
         file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
             None, 
@@ -179,47 +652,1026 @@ class FSpyParser:
             os.path.join(default_dir, default_filename),
             "Images (*.png)"
         )
+        return file_path or None
 
+    def save_image(self, default_filename=None):
+        """画像データを保存し、保存されたパスを返す"""
+        if not self.has_image():
+            return None
+
+        file_path = self.choose_image_path(default_filename)
         if file_path:
             try:
-                with open(file_path, 'wb') as f:
-                    f.write(self.image_data)
+                file_path = write_image_deduplicated(self, file_path)
                 self.image_path = file_path
-                log_message(f"Image saved to: {file_path}", "info")
+                log_message("Image saved to: %s", "info", file_path)
                 return file_path
             except Exception as e:
-                log_message(f"Failed to save image: {str(e)}", "error")
+                log_message("Failed to save image: %s", "error", e)
                 return None
         return None
 
     def get_camera_transform(self):
         """カメラのトランスフォーム行列を計算して返す"""
-        try:
-            camera_parameters = self.state_data.get('cameraParameters', {})
-            if not camera_parameters:
-                raise ValueError("No camera parameters found")
+        return get_camera_transform(self.state_data)
 
-            transform = camera_parameters.get('cameraTransform', {})
-            log_message(f"Camera transform data: {transform}", "trace")
-            rows = transform.get('rows', [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
-            
-            # 位置の取得
-            position = [rows[0][3], rows[1][3], rows[2][3]]
-            
-            # 回転行列の取得（3x3部分）
-            rotation_matrix = [[rows[i][j] for j in range(3)] for i in range(3)]
+    def get_camera_solution(self, rotate_order=None):
+        """カメラの属性値を計算して CameraSolution として返す"""
+        return CameraSolution(self.state_data, rotate_order)
+
+
+class ParseCache:
+    """解析済み fSpy ファイルを (realpath, mtime_ns, size) をキーに保持するLRUキャッシュ
+
+    キャッシュされた状態データは共有されるため、呼び出し側で変更しないこと。
+    """
+    def __init__(self, max_entries=PARSE_CACHE_MAX_ENTRIES, max_bytes=PARSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (entry, nbytes)
+        self._keys_by_path = {}  # realpath -> key
+        self._total_bytes = 0
+        self._lock = threading.Lock()  # 並列解析から同時に呼ばれるため
+
+    @staticmethod
+    def make_key(filepath, stat_result=None):
+        """ファイルのキャッシュキーを作る（ファイルが更新されるとキーも変わる）"""
+        if stat_result is None:
+            stat_result = os.stat(filepath)
+        return (os.path.realpath(filepath), stat_result.st_mtime_ns, stat_result.st_size)
+
+    def get(self, key):
+        """キャッシュされた解析結果を返す（存在しない場合は None）"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def store(self, parser):
+        """解析済みの FSpyParser の結果を登録する"""
+        if parser.cache_key is None or parser.state_data is None:
+            return
+        entry = {
+            'state_data': parser.state_data,
+            'image_offset': parser.image_offset,
+            'image_size': parser.image_size,
+        }
+        # 状態データのサイズをメモリ使用量の目安とする
+        nbytes = parser.image_offset - FSpyParser.HEADER_SIZE
+        key = parser.cache_key
+        with self._lock:
+            # 同じファイルの古いエントリは無効化する
+            old_key = self._keys_by_path.get(key[0])
+            if old_key is not None:
+                self._remove(old_key)
+            self._entries[key] = (entry, nbytes)
+            self._keys_by_path[key[0]] = key
+            self._total_bytes += nbytes
+            self._evict()
+
+    def clear(self):
+        """すべてのエントリを削除する"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._total_bytes = 0
+
+    def _remove(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._total_bytes -= item[1]
+            if self._keys_by_path.get(key[0]) == key:
+                del self._keys_by_path[key[0]]
+
+    def _evict(self):
+        """上限を超えた分を古い順に削除する"""
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+parse_cache = ParseCache()
+
+
+def clear_parse_cache():
+    """解析結果キャッシュを空にする"""
+    parse_cache.clear()
+
+
+def get_camera_transform(state_data):
+    """状態データからカメラの位置と回転行列を計算して返す"""
+    try:
+        camera_parameters = state_data.get('cameraParameters', {})
+        if not camera_parameters:
+            raise ValueError("No camera parameters found")
+
+        transform = camera_parameters.get('cameraTransform', {})
+        log_message("Camera transform data: %s", "trace", LogPayload(transform))
+        rows = transform.get('rows', [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+        
+        # 位置の取得
+        position = [rows[0][3], rows[1][3], rows[2][3]]
+        
+        # 回転行列の取得（3x3部分）
+        rotation_matrix = [[rows[i][j] for j in range(3)] for i in range(3)]
+        
+        if USE_NUMPY:
+            rotation_matrix = np.array(rotation_matrix)
+        else:
+            rotation_matrix = Matrix3x3(rotation_matrix)
             
-            if USE_NUMPY:
-                rotation_matrix = np.array(rotation_matrix)
+        log_message("Position: %s, Rotation matrix: %s", "trace", position, LogPayload(rotation_matrix))
+        return position, rotation_matrix
+        
+    except Exception as e:
+        log_message("Failed to calculate camera transform: %s", "error", e)
+        return None
+
+
+def get_default_image_dir():
+    """Mayaプロジェクトの images フォルダのパスを取得"""
+    project_path = cmds.workspace(query=True, rootDirectory=True)
+    return os.path.join(project_path, "images")
+
+
+def get_relative_path(filepath):
+    """Mayaプロジェクトからの相対パスを取得"""
+    try:
+        project_path = cmds.workspace(query=True, rootDirectory=True)
+        project_path = os.path.normpath(project_path)
+        filepath = os.path.normpath(filepath)
+
+        # プロジェクトパス内かチェック
+        if filepath.startswith(project_path):
+            rel_path = os.path.relpath(filepath, project_path)
+            log_message("Converted to relative path: %s", "info", rel_path)
+            return rel_path
+        return filepath
+    except Exception as e:
+        log_message("Failed to get relative path: %s", "error", e)
+        return filepath
+
+
+class CameraSolution:
+    """fSpy の状態データから計算したカメラの属性値（Maya/Qt 非依存）"""
+    def __init__(self, state_data, rotate_order=None):
+        self.translate = None  # (x, y, z)
+        self.rotate = None  # (x, y, z) 度
+        self.rotate_order = rotate_order or DEFAULT_ROTATE_ORDER
+        self.horizontal_film_aperture = None  # inch
+        self.vertical_film_aperture = None  # inch
+        self.horizontal_film_offset = None  # inch
+        self.vertical_film_offset = None  # inch
+        self.film_fit = None
+        self.focal_length = None  # mm
+        self.solve(state_data)
+
+    def solve(self, state_data):
+        """状態データからすべての属性値を計算する"""
+        params = state_data.get('cameraParameters', {})
+        transform_data = get_camera_transform(state_data)
+
+        # 位置と回転
+        if transform_data:
+            pos, rot_matrix = transform_data
+            self.translate = (pos[0], pos[1], pos[2])
+            rot_euler = rotation_matrix_to_euler(rot_matrix, self.rotate_order)
+            self.rotate = tuple(math.degrees(angle) for angle in rot_euler)
+
+        if not params:
+            return
+
+        # フィルムバック（mmからinchへの変換）
+        image_width = float(params.get('imageWidth', 1920))
+        image_height = float(params.get('imageHeight', 1080))
+        aspect_ratio = image_width / image_height
+        vert_aperture_mm = HORIZONTAL_APERTURE_MM / aspect_ratio
+        self.horizontal_film_aperture = HORIZONTAL_APERTURE_MM * MM_TO_INCH
+        self.vertical_film_aperture = vert_aperture_mm * MM_TO_INCH
+
+        # フィルムオフセット（mmからinchへの変換）
+        principal_point = params.get('principalPoint', [0, 0])
+        if isinstance(principal_point, list) and len(principal_point) == 2:
+            self.horizontal_film_offset = float(principal_point[0]) * HORIZONTAL_APERTURE_MM * MM_TO_INCH
+            self.vertical_film_offset = float(principal_point[1]) * vert_aperture_mm * MM_TO_INCH
+
+        self.film_fit = FILM_FIT_HORIZONTAL
+
+        # horizontalFieldOfView（ラジアン）から焦点距離を計算
+        horizontal_fov = params.get('horizontalFieldOfView', None)
+        if horizontal_fov is not None:
+            self.focal_length = (HORIZONTAL_APERTURE_MM / 2) / math.tan(float(horizontal_fov) / 2)
+
+
+def apply_camera_solution(solution, camera, camera_shape):
+    """CameraSolution の値をカメラに適用する（トランスフォームとシェイプをそれぞれ1コマンドで設定）"""
+    transform_flags = {}
+    if solution.translate is not None:
+        transform_flags['translation'] = solution.translate
+    if solution.rotate is not None:
+        transform_flags['rotation'] = solution.rotate
+    if solution.rotate_order != DEFAULT_ROTATE_ORDER:
+        cmds.setAttr(f"{camera}.rotateOrder", ROTATE_ORDERS.index(solution.rotate_order))
+    if transform_flags:
+        cmds.xform(camera, objectSpace=True, **transform_flags)
+        log_message("Set position: %s, rotation: %s", "info", solution.translate, solution.rotate)
+
+    shape_flags = {}
+    if solution.horizontal_film_aperture is not None:
+        shape_flags['horizontalFilmAperture'] = solution.horizontal_film_aperture
+        shape_flags['verticalFilmAperture'] = solution.vertical_film_aperture
+    if solution.horizontal_film_offset is not None:
+        shape_flags['horizontalFilmOffset'] = solution.horizontal_film_offset
+        shape_flags['verticalFilmOffset'] = solution.vertical_film_offset
+    if solution.film_fit is not None:
+        shape_flags['filmFit'] = FILM_FIT_NAMES[solution.film_fit]
+    if solution.focal_length is not None:
+        shape_flags['focalLength'] = solution.focal_length
+    if shape_flags:
+        cmds.camera(camera_shape, edit=True, **shape_flags)
+        log_message("Set camera attributes: %s", "info", shape_flags)
+
+    if solution.film_fit is not None:
+        # カメラをロックする
+        cmds.setAttr(f"{camera}.tx", lock=True)
+
+
+def _create_rig_cmds(solution):
+    """maya.cmds でカメラリグを生成する"""
+    # カメラをグループの中に入れて生成
+    group = cmds.group(empty=True, name=RIG_GROUP_NAME)
+    camera = cmds.camera(name="fspy_camera")[0]
+    camera_shape = cmds.listRelatives(camera, shapes=True)[0]
+    cmds.parent(camera, group)
+
+    apply_camera_solution(solution, camera, camera_shape)
+    return group, camera
+
+
+def _create_rig_openmaya(solution, om=None):
+    """OpenMaya 2.0 でカメラリグを生成する（ノード生成は1回の doIt で行う）
+
+    API による変更はアンドゥキューに積まれない点に注意。
+    om には maya.api.OpenMaya と同じ API を持つ代替モジュールを渡すことができ、
+    Maya の外でも生成手順を確認できる（省略時は maya.api.OpenMaya）。
+    """
+    if om is None:
+        import maya.api.OpenMaya as om
+
+    dag_modifier = om.MDagModifier()
+    group_obj = dag_modifier.createNode("transform", om.MObject.kNullObj)
+    camera_obj = dag_modifier.createNode("transform", group_obj)
+    shape_obj = dag_modifier.createNode("camera", camera_obj)
+    dag_modifier.renameNode(group_obj, RIG_GROUP_NAME)
+    dag_modifier.renameNode(camera_obj, "fspy_camera")
+    dag_modifier.renameNode(shape_obj, "fspy_cameraShape")
+    dag_modifier.doIt()
+
+    transform_fn = om.MFnTransform(camera_obj)
+    if solution.translate is not None:
+        transform_fn.setTranslation(om.MVector(*solution.translate), om.MSpace.kTransform)
+    if solution.rotate is not None:
+        order_name = "k" + solution.rotate_order.upper()
+        transform_fn.setRotationOrder(getattr(om.MTransformationMatrix, order_name), False)
+        rotation = om.MEulerRotation(
+            *[math.radians(angle) for angle in solution.rotate],
+            getattr(om.MEulerRotation, order_name)
+        )
+        transform_fn.setRotation(rotation, om.MSpace.kTransform)
+
+    camera_fn = om.MFnCamera(shape_obj)
+    if solution.horizontal_film_aperture is not None:
+        camera_fn.horizontalFilmAperture = solution.horizontal_film_aperture
+        camera_fn.verticalFilmAperture = solution.vertical_film_aperture
+    if solution.horizontal_film_offset is not None:
+        camera_fn.horizontalFilmOffset = solution.horizontal_film_offset
+        camera_fn.verticalFilmOffset = solution.vertical_film_offset
+    if solution.film_fit is not None:
+        camera_fn.filmFit = solution.film_fit
+        # カメラをロックする
+        transform_fn.findPlug("translateX", False).isLocked = True
+    if solution.focal_length is not None:
+        camera_fn.focalLength = solution.focal_length
+    log_message("Created camera rig via OpenMaya: %s", "info", transform_fn.partialPathName())
+
+    return om.MFnDagNode(group_obj).partialPathName(), transform_fn.partialPathName()
+
+
+RIG_BACKENDS = {
+    "cmds": _create_rig_cmds,
+    "openmaya": _create_rig_openmaya,
+}
+
+
+class PlateRegistry:
+    """画像フォルダ内の書き出し済み画像を内容のハッシュで管理するレジストリ
+
+    plates: ハッシュ -> ファイル名, sources: fSpy ファイルのキー -> ハッシュ
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, PLATE_REGISTRY_FILENAME)
+        self.plates = {}
+        self.sources = {}
+        self.readable = True  # False の場合、登録内容が不明なので保存も上書きもしない
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.plates = data.get('plates', {})
+                self.sources = data.get('sources', {})
+            except (OSError, ValueError) as e:
+                self.readable = False
+                log_message("Ignoring unreadable plate registry %s: %s", "error", self.path, e)
+
+    @staticmethod
+    def source_key(parser):
+        """fSpy ファイルのキー（ファイルが更新されると変わる）"""
+        if parser.cache_key is None:
+            return None
+        return "|".join(str(value) for value in parser.cache_key)
+
+    def find(self, image_hash):
+        """ハッシュに一致する既存の画像のパスを返す（存在しない場合は None）"""
+        name = self.plates.get(image_hash)
+        if name is None:
+            return None
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            del self.plates[image_hash]
+            return None
+        return path
+
+    def owner(self, name):
+        """ファイル名で登録されている画像のハッシュを返す（存在しない場合は None）"""
+        for image_hash, plate_name in list(self.plates.items()):
+            if plate_name == name and self.find(image_hash):
+                return image_hash
+        return None
+
+    def record_source(self, parser):
+        """fSpy ファイルのキーと画像のハッシュを記録する（同じファイルの古いキーは削除する）"""
+        source_key = self.source_key(parser)
+        if not source_key:
+            return
+        prefix = parser.cache_key[0] + "|"
+        for key in [key for key in self.sources if key.startswith(prefix)]:
+            del self.sources[key]
+        self.sources[source_key] = parser.image_hash
+
+    def save(self):
+        """レジストリを保存する（読み込み中のほかのプロセスが壊れたファイルを見ないよう置き換える）"""
+        if not self.readable:
+            # 読めなかったレジストリを空の内容で上書きしない
+            log_message("Not saving over unreadable plate registry: %s", "error", self.path)
+            return
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'plates': self.plates, 'sources': self.sources}, f, indent=1)
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+_plate_registry_lock = threading.Lock()
+
+
+def write_image_deduplicated(parser, file_path):
+    """同じ内容の画像が書き出し済みならそれを再利用し、実際の画像のパスを返す
+
+    同じ fSpy ファイルからの再インポートでは読み書きを一切行わない。
+    それ以外は埋め込み画像のハッシュを読み込みのみで計算し、未登録の場合だけ書き出す。
+    別の内容として登録済みの画像は上書きせず、ハッシュを付けた別名で書き出す。
+    ロックはレジストリの読み書きの間だけ保持し、画像のコピー中は保持しない。
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    source_key = PlateRegistry.source_key(parser)
+
+    # 同じ fSpy ファイルから書き出し済みの場合
+    if source_key:
+        with _plate_registry_lock:
+            registry = PlateRegistry(directory)
+            known_hash = registry.sources.get(source_key)
+            existing = registry.find(known_hash) if known_hash else None
+        if existing:
+            parser.image_hash = known_hash
+            log_message("Reusing extracted image: %s", "info", existing)
+            return existing
+
+    # 同じ内容の画像が書き出し済みであれば、書き込みは行わない
+    image_hash = parser.compute_image_hash()
+    with _plate_registry_lock:
+        registry = PlateRegistry(directory)
+        existing = registry.find(image_hash)
+        if existing:
+            registry.record_source(parser)
+            registry.save()
+    if existing:
+        log_message("Image identical to existing file, reusing: %s", "info", existing)
+        return existing
+
+    # 並行して書き出すワーカーと一時ファイルが重ならないようにする
+    temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        parser.write_image(temp_path)
+        with _plate_registry_lock:
+            registry = PlateRegistry(directory)
+            existing = registry.find(parser.image_hash)
+            if existing:
+                # 書き出している間に、ほかのワーカーが同じ内容を登録した場合
+                file_path = existing
             else:
-                rotation_matrix = Matrix3x3(rotation_matrix)
-                
-            log_message(f"Position: {position}, Rotation matrix: {rotation_matrix}", "trace")
-            return position, rotation_matrix
-            
+                owner = registry.owner(os.path.basename(file_path))
+                taken = owner is not None and owner != parser.image_hash
+                if not registry.readable and os.path.exists(file_path):
+                    # 登録内容が不明な場合、既存の画像はほかのリグが使っているものとみなす
+                    taken = True
+                if taken:
+                    base, ext = os.path.splitext(file_path)
+                    file_path = f"{base}_{parser.image_hash[:8]}{ext}"
+                    log_message("Not overwriting plate with different content, writing: %s", "info", file_path)
+                os.replace(temp_path, file_path)
+                registry.plates[parser.image_hash] = os.path.basename(file_path)
+            registry.record_source(parser)
+            registry.save()
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return file_path
+
+
+def get_proxy_image_path(image_path, scale):
+    """プロキシ画像のパスを取得（元画像と同じフォルダに置く）"""
+    names = {value: name for name, value in PROXY_SCALES.items()}
+    suffix = names.get(scale, f"proxy{int(scale * 100)}")
+    base, ext = os.path.splitext(image_path)
+    return f"{base}_{suffix}{ext}"
+
+
+def generate_proxy_image(image_path, scale):
+    """縮小したプロキシ画像を生成し、そのパスを返す（ワーカースレッドから呼び出し可能）"""
+    proxy_path = get_proxy_image_path(image_path, scale)
+    if os.path.exists(proxy_path) and os.path.getmtime(proxy_path) >= os.path.getmtime(image_path):
+        # 既存のプロキシが元画像より新しければ再利用する
+        return proxy_path
+
+    if not USE_QT:
+        raise ImportError("PySide2 or PySide6 is required to generate proxy images")
+    reader = QtGui.QImageReader(image_path)
+    size = reader.size()
+    if not size.isValid():
+        raise ValueError(f"Failed to read image size: {reader.errorString()}")
+
+    # デコード時に縮小することで、フル解像度の画像をメモリに展開しない
+    reader.setScaledSize(QtCore.QSize(
+        max(1, int(size.width() * scale)),
+        max(1, int(size.height() * scale))
+    ))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"Failed to decode image: {reader.errorString()}")
+
+    if not image.save(proxy_path):
+        raise ValueError(f"Failed to write proxy image: {proxy_path}")
+    log_message("Proxy image saved to: %s (%dx%d)", "info", proxy_path, image.width(), image.height())
+    return proxy_path
+
+
+def attach_image_plane(camera, image_path, proxy_path=None):
+    """カメラにイメージプレーンを作成し、そのシェイプ名を返す
+
+    proxy_path を指定した場合はプロキシ画像を表示し、フル解像度の画像との
+    切り替え用に両方のパスをイメージプレーンに記録する。
+    """
+    # プロジェクトパスからの相対パスを取得
+    image_path_for_plane = get_relative_path(proxy_path or image_path)
+    # イメージプレーンの作成
+    image_plane = cmds.imagePlane(camera=camera, fileName=image_path_for_plane)[-1]
+    log_message("Image plane created with file: %s", "info", image_path_for_plane)
+
+    if proxy_path:
+        for attr, path in (('fspyFullImage', image_path), ('fspyProxyImage', proxy_path)):
+            cmds.addAttr(image_plane, longName=attr, dataType="string")
+            cmds.setAttr(f"{image_plane}.{attr}", get_relative_path(path), type="string")
+    return image_plane
+
+
+def replace_image_plane(camera, image_path, proxy_path=None):
+    """カメラの既存のイメージプレーンの画像を差し替える（なければ新しく作成する）"""
+    image_planes = get_camera_image_planes(camera)
+    if not image_planes:
+        return attach_image_plane(camera, image_path, proxy_path)
+
+    image_plane = image_planes[0]
+    image_path_for_plane = get_relative_path(proxy_path or image_path)
+    cmds.setAttr(f"{image_plane}.imageName", image_path_for_plane, type="string")
+    if proxy_path:
+        for attr, path in (('fspyFullImage', image_path), ('fspyProxyImage', proxy_path)):
+            _set_string_attr(image_plane, attr, get_relative_path(path))
+    else:
+        # プロキシを使わない場合、古いパスで切り替えられないようにする
+        for attr in ('fspyFullImage', 'fspyProxyImage'):
+            if cmds.attributeQuery(attr, node=image_plane, exists=True):
+                cmds.deleteAttr(f"{image_plane}.{attr}")
+    log_message("Image plane %s updated with file: %s", "info", image_plane, image_path_for_plane)
+    return image_plane
+
+
+def get_camera_image_planes(camera):
+    """カメラに接続されたイメージプレーンのシェイプを取得"""
+    camera_shapes = cmds.listRelatives(camera, shapes=True, type="camera") or [camera]
+    image_planes = cmds.listConnections(
+        f"{camera_shapes[0]}.imagePlane", source=True, destination=False, shapes=True
+    ) or []
+    return [plane for plane in image_planes if cmds.nodeType(plane) == "imagePlane"]
+
+
+def set_image_plane_resolution(camera, full_resolution):
+    """カメラのイメージプレーンをフル解像度とプロキシで切り替える"""
+    attr = 'fspyFullImage' if full_resolution else 'fspyProxyImage'
+    for image_plane in get_camera_image_planes(camera):
+        if not cmds.attributeQuery(attr, node=image_plane, exists=True):
+            continue
+        path = cmds.getAttr(f"{image_plane}.{attr}")
+        cmds.setAttr(f"{image_plane}.imageName", path, type="string")
+        log_message("Image plane %s set to: %s", "info", image_plane, path)
+
+
+def toggle_image_plane_resolution(camera):
+    """カメラのイメージプレーンのフル解像度/プロキシを反転する"""
+    for image_plane in get_camera_image_planes(camera):
+        if not cmds.attributeQuery('fspyFullImage', node=image_plane, exists=True):
+            continue
+        showing_full = cmds.getAttr(f"{image_plane}.imageName") == cmds.getAttr(f"{image_plane}.fspyFullImage")
+        set_image_plane_resolution(camera, not showing_full)
+        return
+
+
+def hash_state_data(state_data):
+    """状態データ（JSON）の内容の SHA-1 を返す（キーの順序に依存しない）"""
+    return hashlib.sha1(json.dumps(state_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _set_string_attr(node, attr, value):
+    """文字列属性を（なければ追加して）設定する（値が同じ場合は書き込まない）"""
+    if not cmds.attributeQuery(attr, node=node, exists=True):
+        cmds.addAttr(node, longName=attr, dataType="string")
+    elif cmds.getAttr(f"{node}.{attr}") == value:
+        return
+    cmds.setAttr(f"{node}.{attr}", value, type="string")
+
+
+def _get_string_attr(node, attr):
+    """文字列属性の値を返す（属性がない場合は None）"""
+    if not cmds.attributeQuery(attr, node=node, exists=True):
+        return None
+    return cmds.getAttr(f"{node}.{attr}") or None
+
+
+def tag_camera_rig(group, parser=None):
+    """グループに fSpy リグであることを示すタグ属性を付ける
+
+    parser を指定した場合は、再インポート用にソースのパスと状態データのハッシュも記録する。
+    画像のハッシュはイメージプレーンに反映した時点で record_rig_plate_hash が記録する。
+    """
+    if not cmds.attributeQuery(RIG_TAG_ATTR, node=group, exists=True):
+        cmds.addAttr(group, longName=RIG_TAG_ATTR, attributeType="bool", defaultValue=True)
+    if parser is None:
+        return
+    _set_string_attr(group, RIG_SOURCE_ATTR, os.path.realpath(parser.filepath))
+    _set_string_attr(group, RIG_STATE_HASH_ATTR, hash_state_data(parser.state_data))
+
+
+def record_rig_plate_hash(camera, image_hash):
+    """カメラのリグのグループに、イメージプレーンの画像のハッシュを記録する"""
+    parents = cmds.listRelatives(camera, parent=True, fullPath=True) or []
+    if parents and image_hash:
+        _set_string_attr(parents[0], RIG_PLATE_HASH_ATTR, image_hash)
+
+
+def index_rigs_by_source(groups=None):
+    """ソースの fSpy ファイルの実パス -> リグのグループのリスト の辞書を返す
+
+    同じファイルを複数回インポートした場合は、すべてのリグが含まれる。
+    """
+    rigs = {}
+    for group in find_camera_rigs() if groups is None else groups:
+        source = _get_string_attr(group, RIG_SOURCE_ATTR)
+        if source:
+            rigs.setdefault(source, []).append(group)
+    return rigs
+
+
+def find_rigs_for_source(filepath):
+    """fSpy ファイルから生成されたリグのグループのリストを返す（見つからない場合は空）"""
+    return index_rigs_by_source().get(os.path.realpath(filepath), [])
+
+
+def get_rig_camera(group):
+    """リグのグループ直下のカメラのトランスフォームを返す"""
+    for child in cmds.listRelatives(group, children=True, type="transform", fullPath=True) or []:
+        if cmds.listRelatives(child, shapes=True, type="camera"):
+            return child
+    return None
+
+
+def find_camera_rigs(selection_only=False):
+    """シーン内（または選択中）の fSpy リグのグループを返す
+
+    タグ属性を持つグループを探し、タグのない古いリグは名前で判定する。
+    選択中のノードはカメラでもイメージプレーンでも、親を辿ってグループを見つける。
+    """
+    tagged = set(cmds.ls(f"*.{RIG_TAG_ATTR}", objectsOnly=True, long=True, recursive=True) or [])
+    named = set(cmds.ls(f"{RIG_GROUP_NAME}*", type="transform", long=True, recursive=True) or [])
+    rigs = tagged | named
+    if not selection_only:
+        return sorted(rigs)
+
+    selected = set()
+    for node in cmds.ls(selection=True, long=True) or []:
+        # DAGパスの先頭側から順に、リグのグループに一致するものを探す
+        parts = node.split("|")
+        for depth in range(2, len(parts) + 1):
+            path = "|".join(parts[:depth])
+            if path in rigs:
+                selected.add(path)
+                break
+    return sorted(selected)
+
+
+def set_group_rotation(group, rotation):
+    """グループの回転を設定する（変化したチャンネルのみを1コマンドで書き込む）
+
+    書き込んだ場合は True を返す。
+    """
+    current = cmds.getAttr(f"{group}.rotate")[0]
+    changed = [axis for axis in range(3) if abs(rotation[axis] - current[axis]) > 1e-9]
+    if not changed:
+        return False
+    if len(changed) == 1:
+        axis = changed[0]
+        cmds.setAttr(f"{group}.rotate{'XYZ'[axis]}", rotation[axis])
+    else:
+        cmds.xform(group, objectSpace=True, rotation=rotation)
+    return True
+
+
+def apply_up_axis_to_rigs(groups, up_axis, offset=(0.0, 0.0, 0.0)):
+    """複数のリグのグループにアップ軸とオフセットをまとめて適用し、更新したリグの数を返す
+
+    回転は回転順序ごとに1回だけ求めて共有し、
+    書き込みは1つのアンドゥチャンクの中でビューポートの更新を止めて行う。
+    """
+    groups = [group for group in groups if cmds.objExists(group)]
+    if not groups:
+        return 0
+
+    by_order = {}
+    for group in groups:
+        order = ROTATE_ORDERS[cmds.getAttr(f"{group}.rotateOrder")]
+        by_order.setdefault(order, []).append(group)
+
+    # オフセットは全リグで共通なので、回転は回転順序ごとに1回だけ求める
+    rotations = {}
+    for order, members in by_order.items():
+        rotation = compose_up_axis_rotation(up_axis, offset, order)
+        for group in members:
+            rotations[group] = rotation
+
+    updated = 0
+    cmds.undoInfo(openChunk=True, chunkName="fspyAdjustUpAxis")
+    cmds.refresh(suspend=True)
+    try:
+        for group in groups:
+            if set_group_rotation(group, rotations[group]):
+                updated += 1
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+
+    log_message("Set up axis on %d/%d rigs: %s, offset: %s", "info", updated, len(groups), up_axis, offset)
+    return updated
+
+
+def create_camera_rig(parser, image_path=None, backend=None, rotate_order=None):
+    """解析済みの FSpyParser からカメラリグを生成し、(group, camera) を返す"""
+    create_rig = RIG_BACKENDS[backend or DEFAULT_RIG_BACKEND]
+
+    # リグ全体を1回のアンドゥで取り消せるようにまとめる
+    cmds.undoInfo(openChunk=True, chunkName="fspyImportCamera")
+    try:
+        group, camera = create_rig(parser.get_camera_solution(rotate_order))
+        tag_camera_rig(group, parser)
+
+        # イメージプレーンの処理
+        if image_path:
+            attach_image_plane(camera, image_path)
+            record_rig_plate_hash(camera, parser.image_hash)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return group, camera
+
+
+def diff_camera_solution(solution, camera, camera_shape):
+    """CameraSolution の値を現在の属性値と比較し、変化した属性 {属性パス: 値} を返す"""
+    targets = {}
+    targets[f"{camera}.rotateOrder"] = ROTATE_ORDERS.index(solution.rotate_order)
+    if solution.translate is not None:
+        targets[f"{camera}.translate"] = tuple(solution.translate)
+    if solution.rotate is not None:
+        targets[f"{camera}.rotate"] = tuple(solution.rotate)
+    shape_values = (
+        ('horizontalFilmAperture', solution.horizontal_film_aperture),
+        ('verticalFilmAperture', solution.vertical_film_aperture),
+        ('horizontalFilmOffset', solution.horizontal_film_offset),
+        ('verticalFilmOffset', solution.vertical_film_offset),
+        ('filmFit', solution.film_fit),
+        ('focalLength', solution.focal_length),
+    )
+    for attr, value in shape_values:
+        if value is not None:
+            targets[f"{camera_shape}.{attr}"] = value
+
+    changes = {}
+    for attr, value in targets.items():
+        current = cmds.getAttr(attr)
+        if isinstance(value, tuple):
+            # double3 の属性は [(x, y, z)] で返る
+            if any(abs(a - b) > 1e-6 for a, b in zip(value, current[0])):
+                changes[attr] = value
+        elif abs(value - current) > 1e-6:
+            changes[attr] = value
+    return changes
+
+
+def update_camera_rig(parser, group, rotate_order=None):
+    """既存のリグを解析結果で更新し、(camera, 変化した属性) を返す
+
+    ノードは作り直さず、値が変化した属性のみを書き込む。
+    rotate_order を省略した場合はカメラの現在の回転順序を維持する。
+    """
+    camera = get_rig_camera(group)
+    if camera is None:
+        raise ValueError(f"No camera found under rig: {group}")
+    camera_shape = cmds.listRelatives(camera, shapes=True, type="camera", fullPath=True)[0]
+    if rotate_order is None:
+        rotate_order = ROTATE_ORDERS[cmds.getAttr(f"{camera}.rotateOrder")]
+
+    changes = diff_camera_solution(parser.get_camera_solution(rotate_order), camera, camera_shape)
+
+    cmds.undoInfo(openChunk=True, chunkName="fspyUpdateCamera")
+    try:
+        # ロックされた translateX は一時的に解除して書き込む
+        unlocked = f"{camera}.translate" in changes and cmds.getAttr(f"{camera}.tx", lock=True)
+        if unlocked:
+            cmds.setAttr(f"{camera}.tx", lock=False)
+        for attr, value in changes.items():
+            if isinstance(value, tuple):
+                cmds.setAttr(attr, *value)
+            else:
+                cmds.setAttr(attr, value)
+        if unlocked:
+            cmds.setAttr(f"{camera}.tx", lock=True)
+        # タグも値が変わったものだけを書き込む
+        tag_camera_rig(group, parser)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    log_message("Updated rig %s: %d changed attributes %s", "info", group, len(changes), LogPayload(changes))
+    return camera, changes
+
+
+def get_rig_image_path(camera):
+    """カメラのイメージプレーンが使っているフル解像度の画像の絶対パスを返す（なければ None）"""
+    for image_plane in get_camera_image_planes(camera):
+        path = _get_string_attr(image_plane, 'fspyFullImage') or cmds.getAttr(f"{image_plane}.imageName")
+        if path:
+            # プロジェクトからの相対パスは絶対パスに戻す
+            return path if os.path.isabs(path) else cmds.workspace(expandName=path)
+    return None
+
+
+def rig_plate_unchanged(parser, group, camera, compute_hash=True):
+    """リグに記録された画像のハッシュが解析結果と一致し、イメージプレーンが残っているか
+
+    一致する場合は画像の書き出しとイメージプレーンの更新を省略できる。
+    compute_hash が False の場合は画像を読まず（メインスレッド用）、
+    ハッシュが未計算なら変更ありとみなす。
+    """
+    recorded = _get_string_attr(group, RIG_PLATE_HASH_ATTR)
+    if not recorded or camera is None or not parser.has_image() or not get_camera_image_planes(camera):
+        return False
+    if not compute_hash and parser.image_hash is None:
+        return False
+    return parser.compute_image_hash() == recorded
+
+
+def benchmark_rig_backends(count=100, state_data=None):
+    """各バックエンドでのカメラ1台あたりの生成時間（秒）を計測する
+
+    計測のために生成したリグは削除される。
+    """
+    if state_data is None:
+        state_data = {
+            'cameraParameters': {
+                'imageWidth': 1920,
+                'imageHeight': 1080,
+                'horizontalFieldOfView': 1.0,
+                'principalPoint': [0.0, 0.0],
+                'cameraTransform': {
+                    'rows': [[1, 0, 0, 0], [0, 1, 0, 2], [0, 0, 1, 10], [0, 0, 0, 1]]
+                },
+            }
+        }
+    solution = CameraSolution(state_data)
+
+    timings = {}
+    for name, create_rig in RIG_BACKENDS.items():
+        groups = []
+        start = time.perf_counter()
+        for _ in range(count):
+            groups.append(create_rig(solution)[0])
+        timings[name] = (time.perf_counter() - start) / count
+        cmds.delete(groups)
+        log_message("Rig backend '%s': %.3f ms per camera", "info", name, timings[name] * 1000)
+    return timings
+
+
+class ParseWorkerSignals(QtCore.QObject):
+    """解析ワーカーからメインスレッドへの通知用シグナル"""
+    finished = QtCore.Signal(object)  # 解析済みの FSpyParser
+    failed = QtCore.Signal(str)
+
+
+class ParseWorker(QtCore.QRunnable):
+    """fSpy ファイルをバックグラウンドで解析するワーカー
+
+    hash_image が True の場合は埋め込み画像のハッシュもここで計算し、
+    メインスレッドでは文字列の比較だけで済むようにする。
+    """
+    def __init__(self, filepath, hash_image=False):
+        super(ParseWorker, self).__init__()
+        # Python 側で寿命を管理する（終了後もキャンセル判定に参照するため）
+        self.setAutoDelete(False)
+        self.filepath = filepath
+        self.hash_image = hash_image
+        # シグナルはメインスレッドで生成し、結果はキュー経由でメインスレッドに届ける
+        self.signals = ParseWorkerSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        """キャンセルする（解析が終わっても結果は通知されない）"""
+        self.cancelled = True
+
+    def run(self):
+        # 情報表示のみなので画像は読み込まない
+        parser = FSpyParser(self.filepath, lazy=True)
+        parsed = parser.parse()
+        if parsed and self.hash_image and parser.has_image() and not self.cancelled:
+            try:
+                parser.compute_image_hash()
+            except (OSError, ValueError) as e:
+                parser.error = e
+                parsed = False
+        if self.cancelled:
+            return
+        if parsed:
+            self.signals.finished.emit(parser)
+        else:
+            self.signals.failed.emit(str(parser.error or "Failed to parse fSpy file"))
+
+
+class ImageWriteWorkerSignals(QtCore.QObject):
+    """画像書き出しワーカーからメインスレッドへの通知用シグナル"""
+    finished = QtCore.Signal(str, str)  # 書き出した画像のパス, プロキシ画像のパス（なければ空文字）
+    failed = QtCore.Signal(str)
+
+
+class ImageWriteWorker(QtCore.QRunnable):
+    """埋め込み画像をバックグラウンドでストリーミングして書き出すワーカー"""
+    def __init__(self, parser, file_path, proxy_scale=1.0):
+        super(ImageWriteWorker, self).__init__()
+        self.setAutoDelete(False)
+        self.parser = parser
+        self.file_path = file_path
+        self.proxy_scale = proxy_scale
+        self.signals = ImageWriteWorkerSignals()
+
+    def run(self):
+        try:
+            self.file_path = write_image_deduplicated(self.parser, self.file_path)
         except Exception as e:
-            log_message(f"Failed to calculate camera transform: {str(e)}", "error")
+            self.signals.failed.emit(str(e))
+            return
+
+        proxy_path = ""
+        if self.proxy_scale < 1.0:
+            try:
+                proxy_path = generate_proxy_image(self.file_path, self.proxy_scale)
+            except Exception as e:
+                # プロキシが作れない場合はフル解像度の画像を使う
+                log_message("Failed to generate proxy image: %s", "error", e)
+        self.signals.finished.emit(self.file_path, proxy_path)
+
+
+class FSpyFileWatcher(QtCore.QObject):
+    """.fspy ファイルの更新を監視し、書き込みが落ち着いてから fileChanged を通知する
+
+    ファイルごとに一定時間変更が続かなくなるまで待ち、内容（mtime とサイズ）が
+    前回の通知から変わっていない場合は通知しない。一時ファイルからの置き換えで
+    監視が外れても、親フォルダの変更から検知して監視し直す。
+    """
+    fileChanged = QtCore.Signal(str)
+
+    def __init__(self, parent=None, debounce_ms=FILE_WATCH_DEBOUNCE_MS):
+        super(FSpyFileWatcher, self).__init__(parent)
+        self.debounce_ms = debounce_ms
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.schedule)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.paths = set()  # 監視中の .fspy ファイルの実パス
+        self.timers = {}  # パス -> 待機中の QTimer
+        self.signatures = {}  # パス -> 最後に通知した (mtime_ns, size)
+
+    @staticmethod
+    def signature(path):
+        try:
+            stat_result = os.stat(path)
+        except OSError:
             return None
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def set_paths(self, paths):
+        """監視するファイルを設定する（監視中のほかのファイルは外す）"""
+        paths = {os.path.realpath(path) for path in paths}
+        for path in self.paths - paths:
+            self.timers.pop(path, None)
+            self.signatures.pop(path, None)
+        for path in paths - self.paths:
+            self.signatures[path] = self.signature(path)
+        self.paths = paths
+
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        existing = [path for path in paths if os.path.exists(path)]
+        directories = {os.path.dirname(path) for path in paths}
+        if existing or directories:
+            self.watcher.addPaths(existing + sorted(directories))
+        log_message("Watching %d fSpy files", "info", len(existing))
+
+    def stop(self):
+        """すべての監視を止める"""
+        self.set_paths([])
+
+    def schedule(self, path):
+        """ファイルの変更通知を受け、待ち時間を延長する"""
+        path = os.path.realpath(path)
+        if path not in self.paths:
+            return
+        timer = self.timers.get(path)
+        if timer is None:
+            timer = QtCore.QTimer(self)
+            timer.setSingleShot(True)
+            timer.setInterval(self.debounce_ms)
+            timer.timeout.connect(lambda: self.flush(path))
+            self.timers[path] = timer
+        timer.start()
+
+    def on_directory_changed(self, directory):
+        """置き換えで監視が外れたファイルを監視し直す"""
+        directory = os.path.realpath(directory)
+        watched = set(self.watcher.files())
+        for path in self.paths:
+            if os.path.dirname(path) != directory or not os.path.exists(path):
+                continue
+            if path not in watched:
+                self.watcher.addPath(path)
+            if self.signature(path) != self.signatures.get(path):
+                self.schedule(path)
+
+    def flush(self, path):
+        """待ち時間が過ぎたファイルについて、内容が変わっていれば通知する"""
+        timer = self.timers.pop(path, None)
+        if timer is not None:
+            timer.deleteLater()
+        signature = self.signature(path)
+        if signature is None:
+            return  # 保存途中で削除されている場合は、再作成時に親フォルダから検知する
+        if path not in self.watcher.files():
+            self.watcher.addPath(path)
+        if signature == self.signatures.get(path):
+            return
+        self.signatures[path] = signature
+        log_message("Watched fSpy file changed: %s", "info", path)
+        self.fileChanged.emit(path)
 
 
 class PluginDialog(QtWidgets.QDialog):
@@ -229,8 +1681,27 @@ class PluginDialog(QtWidgets.QDialog):
         self.fspy_parser = None
         self.group = None
         self.camera = None
+        self.parse_worker = None
+        self.image_workers = set()  # 実行中の画像書き出しワーカー
+        self.sync_workers = set()  # 自動同期のために実行中の解析ワーカー
+        self.up_axis_undo_open = False  # オフセット調整中のアンドゥチャンクが開いているか
+        self.rotate_order_chosen = False  # ユーザーが回転順序を選択したか
         self.setup_ui()
 
+        # 連続した変更をまとめて反映するためのタイマー
+        self.up_axis_timer = QtCore.QTimer(self)
+        self.up_axis_timer.setSingleShot(True)
+        self.up_axis_timer.setInterval(UP_AXIS_DEBOUNCE_MS)
+        self.up_axis_timer.timeout.connect(self.apply_up_axis)
+        self.up_axis_undo_timer = QtCore.QTimer(self)
+        self.up_axis_undo_timer.setSingleShot(True)
+        self.up_axis_undo_timer.setInterval(UP_AXIS_UNDO_IDLE_MS)
+        self.up_axis_undo_timer.timeout.connect(self.finish_up_axis_edit)
+
+        # 保存し直された .fspy ファイルをシーン内のリグに反映する
+        self.file_watcher = FSpyFileWatcher(self)
+        self.file_watcher.fileChanged.connect(self.on_watched_file_changed)
+
     def setup_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
 
@@ -242,6 +1713,18 @@ class PluginDialog(QtWidgets.QDialog):
         file_layout.addWidget(self.file_path)
         file_layout.addWidget(browse_button)
 
+        # 解析中の進捗表示とキャンセルボタン
+        parse_layout = QtWidgets.QHBoxLayout()
+        self.parse_progress = QtWidgets.QProgressBar()
+        self.parse_progress.setRange(0, 0)  # 進捗が不明なためビジー表示
+        self.parse_progress.setFormat("Loading...")
+        self.parse_cancel_button = QtWidgets.QPushButton("Cancel")
+        self.parse_cancel_button.clicked.connect(self.cancel_parse)
+        parse_layout.addWidget(self.parse_progress)
+        parse_layout.addWidget(self.parse_cancel_button)
+        self.parse_progress.setVisible(False)
+        self.parse_cancel_button.setVisible(False)
+
         # カメラ情報表示用テキストフィールドを追加
         info_group = QtWidgets.QGroupBox("Camera Information")
         info_layout = QtWidgets.QVBoxLayout()
@@ -257,16 +1740,16 @@ class PluginDialog(QtWidgets.QDialog):
 
         # アップ軸ウィジェット
         self.up_axis = QtWidgets.QComboBox()
-        self.up_axis.addItems(["X", "Y", "Z", "-X", "-Y", "-Z"])
+        self.up_axis.addItems(list(UP_AXIS_BASIS))
         self.up_axis.setEnabled(False)  # 初期状態では無効
-        self.up_axis.currentIndexChanged.connect(self.apply_up_axis)
+        self.up_axis.currentIndexChanged.connect(self.schedule_up_axis)
         offset_layout.addWidget(QtWidgets.QLabel("Up Axis:"))
         offset_layout.addWidget(self.up_axis)
 
         self.offset_x = QtWidgets.QDoubleSpinBox()
         self.offset_x.setRange(-360, 360)
         self.offset_x.setEnabled(False)  # 初期状態では無効
-        self.offset_x.valueChanged.connect(self.apply_up_axis)
+        self.offset_x.valueChanged.connect(self.schedule_up_axis)
         offset_layout.addWidget(QtWidgets.QLabel("Offset X:"))
         offset_layout.addWidget(self.offset_x)
         # -/+ボタン (90度ずつオフセット値を変更)
@@ -284,7 +1767,7 @@ class PluginDialog(QtWidgets.QDialog):
         self.offset_y = QtWidgets.QDoubleSpinBox()
         self.offset_y.setRange(-360, 360)
         self.offset_y.setEnabled(False)  # 初期状態では無効
-        self.offset_y.valueChanged.connect(self.apply_up_axis)
+        self.offset_y.valueChanged.connect(self.schedule_up_axis)
         offset_layout.addWidget(QtWidgets.QLabel("Offset Y:"))
         offset_layout.addWidget(self.offset_y)
         # -/+ボタン (90度ずつオフセット値を変更)
@@ -302,7 +1785,7 @@ class PluginDialog(QtWidgets.QDialog):
         self.offset_z = QtWidgets.QDoubleSpinBox()
         self.offset_z.setRange(-360, 360)
         self.offset_z.setEnabled(False)  # 初期状態では無効
-        self.offset_z.valueChanged.connect(self.apply_up_axis)
+        self.offset_z.valueChanged.connect(self.schedule_up_axis)
         offset_layout.addWidget(QtWidgets.QLabel("Offset Z:"))
         offset_layout.addWidget(self.offset_z)
         # -/+ボタン (90度ずつオフセット値を変更)
@@ -317,31 +1800,118 @@ class PluginDialog(QtWidgets.QDialog):
         self.offset_z_plus.clicked.connect(lambda: self.offset_z.setValue(self.offset_z.value() + 90))
         offset_layout.addWidget(self.offset_z_plus)
 
+        # 選択中（なければシーン内すべて）の fSpy リグにまとめて適用する
+        self.all_rigs = QtWidgets.QCheckBox("All Rigs")
+        self.all_rigs.setToolTip("Apply the up axis and offsets to the fSpy rigs in the selection, or to every fSpy rig in the scene when nothing is selected")
+        self.all_rigs.toggled.connect(self.on_all_rigs_toggled)
+        offset_layout.addWidget(self.all_rigs)
+
         offset_group_box.setLayout(offset_layout)
 
+        # カメラの回転順序
+        rotate_order_layout = QtWidgets.QHBoxLayout()
+        self.rotate_order = QtWidgets.QComboBox()
+        self.rotate_order.addItems([order.upper() for order in ROTATE_ORDERS])
+        self.rotate_order.setCurrentIndex(ROTATE_ORDERS.index(DEFAULT_ROTATE_ORDER))
+        self.rotate_order.activated.connect(self.on_rotate_order_chosen)
+        rotate_order_layout.addWidget(QtWidgets.QLabel("Camera Rotate Order:"))
+        rotate_order_layout.addWidget(self.rotate_order)
+
+        # イメージプレーンの解像度（プロキシ）
+        self.image_resolution = QtWidgets.QComboBox()
+        self.image_resolution.addItems([name.capitalize() for name in PROXY_SCALES])
+        rotate_order_layout.addWidget(QtWidgets.QLabel("Image Plane:"))
+        rotate_order_layout.addWidget(self.image_resolution)
+        toggle_resolution_button = QtWidgets.QPushButton("Toggle Full Res")
+        toggle_resolution_button.setToolTip("Swap the image plane of the selected (or last imported) cameras between proxy and full resolution")
+        toggle_resolution_button.clicked.connect(self.toggle_image_resolution)
+        rotate_order_layout.addWidget(toggle_resolution_button)
+        # 同じ fSpy ファイルから生成したリグがあれば作り直さずに更新する
+        self.update_existing = QtWidgets.QCheckBox("Update Existing Rig")
+        self.update_existing.setToolTip("Update the rig previously imported from this fSpy file in place, writing only the attributes that changed")
+        rotate_order_layout.addWidget(self.update_existing)
+        self.auto_sync = QtWidgets.QCheckBox("Auto Sync")
+        self.auto_sync.setToolTip("Watch the fSpy files of the rigs in the scene and update the rigs when the files are saved again")
+        self.auto_sync.toggled.connect(self.on_auto_sync_toggled)
+        rotate_order_layout.addWidget(self.auto_sync)
+        rotate_order_layout.addStretch()
+
         # インポートボタン
-        import_button = QtWidgets.QPushButton("Import Camera")
-        import_button.clicked.connect(self.import_camera)
+        self.import_button = QtWidgets.QPushButton("Import Camera")
+        self.import_button.clicked.connect(self.import_camera)
 
         layout.addLayout(file_layout)
+        layout.addLayout(parse_layout)
         layout.addWidget(info_group)
         layout.addWidget(offset_group_box)
-        layout.addWidget(import_button)
+        layout.addLayout(rotate_order_layout)
+        layout.addWidget(self.import_button)
 
     def browse_file(self):
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
             self, "Select fSpy file", "", "fSpy Files (*.fspy)")
         if file_path:
             self.file_path.setText(file_path)
-            self.fspy_parser = FSpyParser(file_path)
-            if self.fspy_parser.parse():
-                log_message("File loaded successfully", "info")
-                # ファイル読み込み時にカメラ情報を表示
-                params = self.fspy_parser.state_data.get('cameraParameters', {})
-                transform_data = self.fspy_parser.get_camera_transform()
-                if params:
-                    self.update_camera_info(params, transform_data)
-                    log_message("Updated camera information display", "info")
+            self.start_parse(file_path)
+
+    def start_parse(self, file_path):
+        """バックグラウンドで fSpy ファイルの解析を開始"""
+        self.cancel_parse()
+        self.fspy_parser = None
+        self.info_text.clear()
+
+        # 再インポート時の比較用にハッシュも計算する（画像の書き出し時に再利用されるため読み込みは増えない）
+        worker = ParseWorker(file_path, hash_image=True)
+        worker.signals.finished.connect(lambda parser: self.on_parse_finished(worker, parser))
+        worker.signals.failed.connect(lambda error: self.on_parse_failed(worker, error))
+        self.parse_worker = worker
+        self.set_parsing(True)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def cancel_parse(self):
+        """実行中の解析をキャンセル"""
+        if self.parse_worker is None:
+            return
+        self.parse_worker.cancel()
+        self.parse_worker = None
+        self.set_parsing(False)
+        log_message("Parsing cancelled", "info")
+
+    def set_parsing(self, parsing):
+        """解析中の表示を切り替える"""
+        self.parse_progress.setVisible(parsing)
+        self.parse_cancel_button.setVisible(parsing)
+        self.import_button.setEnabled(not parsing)
+
+    def on_parse_finished(self, worker, parser):
+        """解析完了時の処理（メインスレッドで呼ばれる）"""
+        if worker is not self.parse_worker:
+            return  # キャンセル済み、または古い解析結果
+        self.parse_worker = None
+        self.set_parsing(False)
+        self.fspy_parser = parser
+        log_message("File loaded successfully", "info")
+
+        # ファイル読み込み時にカメラ情報を表示
+        params = self.fspy_parser.state_data.get('cameraParameters', {})
+        transform_data = self.fspy_parser.get_camera_transform()
+        if params:
+            self.update_camera_info(params, transform_data)
+            log_message("Updated camera information display", "info")
+
+    def on_parse_failed(self, worker, error):
+        """解析失敗時の処理（メインスレッドで呼ばれる）"""
+        if worker is not self.parse_worker:
+            return
+        self.parse_worker = None
+        self.set_parsing(False)
+        self.info_text.setText(f"Failed to load file: {error}")
+
+    def closeEvent(self, event):
+        self.cancel_parse()
+        self.file_watcher.stop()
+        self.finish_up_axis_edit()
+        super(PluginDialog, self).closeEvent(event)
 
     def update_camera_info(self, params, transform_data=None):
         """カメラ情報をテキストフィールドに表示"""
@@ -372,8 +1942,9 @@ class PluginDialog(QtWidgets.QDialog):
                 info_text.append(f"  Z: {pos[2]:.3f}")
 
                 # 回転情報を追加
-                rot_euler = rotation_matrix_to_euler(rot_matrix)
-                info_text.append("Camera Rotation (degrees):")
+                rotate_order = self.get_rotate_order()
+                rot_euler = rotation_matrix_to_euler(rot_matrix, rotate_order)
+                info_text.append(f"Camera Rotation (degrees, {rotate_order.upper()}):")
                 info_text.append(f"  X: {math.degrees(rot_euler[0]):.3f}")
                 info_text.append(f"  Y: {math.degrees(rot_euler[1]):.3f}")
                 info_text.append(f"  Z: {math.degrees(rot_euler[2]):.3f}")
@@ -401,9 +1972,9 @@ class PluginDialog(QtWidgets.QDialog):
             log_message("Camera information updated successfully", "info")
             
         except Exception as e:
-            log_message(f"Error updating camera information: {str(e)}", "error")
+            log_message("Error updating camera information: %s", "error", e)
             import traceback
-            log_message(f"Traceback: {traceback.format_exc()}", "error")
+            log_message("Traceback: %s", "error", traceback.format_exc)
 
     def enable_offset_controls(self):
         """オフセットコントロールを有効化"""
@@ -419,31 +1990,37 @@ class PluginDialog(QtWidgets.QDialog):
 
     def get_relative_path(self, filepath):
         """Mayaプロジェクトからの相対パスを取得"""
-        try:
-            project_path = cmds.workspace(query=True, rootDirectory=True)
-            project_path = os.path.normpath(project_path)
-            filepath = os.path.normpath(filepath)
-            
-            # プロジェクトパス内かチェック
-            if filepath.startswith(project_path):
-                rel_path = os.path.relpath(filepath, project_path)
-                log_message(f"Converted to relative path: {rel_path}", "info")
-                return rel_path
-            return filepath
-        except Exception as e:
-            log_message(f"Failed to get relative path: {str(e)}", "error")
-            return filepath
+        return get_relative_path(filepath)
+
+    def on_rotate_order_chosen(self, index):
+        """回転順序がユーザーの操作で選ばれた場合のみ、再インポート時に反映する"""
+        self.rotate_order_chosen = True
+
+    def get_rotate_order(self):
+        """選択中のカメラの回転順序を取得"""
+        return ROTATE_ORDERS[self.rotate_order.currentIndex()]
 
     def import_camera(self):
+        # 前のリグへの保留中の変更を確定する
+        self.finish_up_axis_edit()
+
         if not self.fspy_parser or not self.fspy_parser.state_data:
             log_message("No valid fSpy file loaded", "error")
             return
 
         try:
-            # 先に画像を保存
-            if self.fspy_parser.image_data:
+            groups = []
+            if self.update_existing.isChecked():
+                groups = find_rigs_for_source(self.fspy_parser.filepath)
+            if groups:
+                self.update_camera(groups)
+                return
+
+            # 画像の保存先を先に決める（書き出しはカメラ生成後にバックグラウンドで行う）
+            image_path = None
+            if self.fspy_parser.has_image():
                 default_filename = os.path.splitext(os.path.basename(self.fspy_parser.filepath))[0] + ".jpg"
-                image_path = self.fspy_parser.save_image(default_filename)
+                image_path = self.fspy_parser.choose_image_path(default_filename)
                 if not image_path:
                     if not QtWidgets.QMessageBox.question(
                         self,
@@ -453,132 +2030,225 @@ class PluginDialog(QtWidgets.QDialog):
                     ) == QtWidgets.QMessageBox.Yes:
                         return
 
-            # カメラをグループの中に入れて生成
-            self.group = cmds.group(empty=True, name="fspy_camera_group")
-            self.camera = cmds.camera(name="fspy_camera")[0]
-            camera_shape = cmds.listRelatives(self.camera, shapes=True)[0]
-            cmds.parent(self.camera, self.group)
-            
-            params = self.fspy_parser.state_data.get('cameraParameters', {})
-            transform_data = self.fspy_parser.get_camera_transform()
-
-            # カメラ情報の表示を更新
-            if params:
-                self.update_camera_info(params, transform_data)
+            # カメラリグを生成
+            self.group, self.camera = create_camera_rig(
+                self.fspy_parser, rotate_order=self.get_rotate_order()
+            )
 
-            # 位置を設定
-            if transform_data:
-                pos, rot_matrix = transform_data
-
-                cmds.setAttr(f"{self.camera}.translateX", pos[0])
-                cmds.setAttr(f"{self.camera}.translateY", pos[1])
-                cmds.setAttr(f"{self.camera}.translateZ", pos[2])
-                log_message(f"Set position: {pos}", "info")
-
-                # 回転を設定
-                rot_euler = rotation_matrix_to_euler(rot_matrix)
-                cmds.setAttr(f"{self.camera}.rotateX", math.degrees(rot_euler[0]))
-                cmds.setAttr(f"{self.camera}.rotateY", math.degrees(rot_euler[1]))
-                cmds.setAttr(f"{self.camera}.rotateZ", math.degrees(rot_euler[2]))
-                log_message(f"Set rotation: {rot_euler}", "info")
+            # 画像の書き出しが完了したらイメージプレーンを作成する
+            if image_path:
+                proxy_scale = list(PROXY_SCALES.values())[self.image_resolution.currentIndex()]
+                self.start_image_write(self.fspy_parser, image_path, [self.camera], proxy_scale)
 
-            # カメラプロパティの設定
+            # カメラ情報の表示を更新
+            params = self.fspy_parser.state_data.get('cameraParameters', {})
             if params:
-                # フィルムバックの設定（mmからinchへの変換）
-                image_width = float(params.get('imageWidth', 1920))
-                image_height = float(params.get('imageHeight', 1080))
-                aspect_ratio = image_width / image_height
-                horiz_aperture_mm = 36.0  # 35mmフィルム規格
-                vert_aperture_mm = horiz_aperture_mm / aspect_ratio
-                mm_to_inch = 0.0393701
-                horiz_aperture_inch = horiz_aperture_mm * mm_to_inch
-                vert_aperture_inch = vert_aperture_mm * mm_to_inch
-
-                cmds.setAttr(f"{camera_shape}.horizontalFilmAperture", horiz_aperture_inch)
-                cmds.setAttr(f"{camera_shape}.verticalFilmAperture", vert_aperture_inch)
-                log_message(f"Set film back (in inches): {horiz_aperture_inch}x{vert_aperture_inch}", "info")
-
-                # フィルムオフセットの設定（mmからinchへの変換）
-                principal_point = params.get('principalPoint', [0, 0])
-                if isinstance(principal_point, list) and len(principal_point) == 2:
-                    x_offset_mm = float(principal_point[0]) * horiz_aperture_mm
-                    y_offset_mm = float(principal_point[1]) * vert_aperture_mm
-                    x_offset_inch = x_offset_mm * mm_to_inch
-                    y_offset_inch = y_offset_mm * mm_to_inch
-
-                    cmds.setAttr(f"{camera_shape}.horizontalFilmOffset", x_offset_inch)
-                    cmds.setAttr(f"{camera_shape}.verticalFilmOffset", y_offset_inch)
-                    log_message(f"Set film offset (in inches): {x_offset_inch}x{y_offset_inch}", "info")
-
-                # フィルムフィット調整
-                cmds.setAttr(f"{camera_shape}.filmFit", 1)  # Horizontal fit
-
-                # カメラをロックする
-                cmds.setAttr(f"{self.camera}.tx", lock=True)
-
-                # horizontalFieldOfViewの設定
-                horizontal_fov = params.get('horizontalFieldOfView', None)
-                if horizontal_fov is not None:
-                    horizontal_fov_degrees = math.degrees(horizontal_fov)  # ラジアンから度に変換
-                    focal_length = (horiz_aperture_mm / 2) / math.tan(math.radians(horizontal_fov_degrees) / 2)
-                    cmds.setAttr(f"{camera_shape}.focalLength", focal_length)
-                    log_message(f"Set focal length based on horizontalFieldOfView: {focal_length}", "info")
-
-            # イメージプレーンの処理
-            if image_path:
-                # プロジェクトパスからの相対パスを取得
-                image_path_for_plane = self.get_relative_path(image_path)
-                # イメージプレーンの作成
-                image_plane = cmds.imagePlane(camera=self.camera, fileName=image_path_for_plane)
-                log_message(f"Image plane created with file: {image_path_for_plane}", "info")
+                self.update_camera_info(params, self.fspy_parser.get_camera_transform())
 
             # オフセットコントロールを有効化
             self.enable_offset_controls()
+            self.refresh_watched_files()
             log_message("Camera created and controls enabled", "info")
 
         except Exception as e:
-            log_message(f"Failed to create camera: {str(e)}", "error")
+            log_message("Failed to create camera: %s", "error", e)
             raise
 
-    def apply_up_axis(self):
-        if not self.group:
+    def update_camera(self, groups):
+        """同じファイルから生成した既存のリグを再インポートした内容で更新する
+
+        画像が変わっていなければ書き出さない。変わっている場合は1回だけ書き出してすべてのリグに反映する。
+        """
+        parser = self.fspy_parser
+        # 回転順序はユーザーが明示的に選んだ場合のみ変更し、それ以外はリグの回転順序を維持する
+        rotate_order = self.get_rotate_order() if self.rotate_order_chosen else None
+        stale_cameras = []  # イメージプレーンの画像を差し替えるカメラ
+        for group in groups:
+            camera = get_rig_camera(group)
+            if camera is None:
+                log_message("No camera found under rig %s, skipping update", "info", group)
+                continue
+            # ハッシュは解析ワーカーで計算済み。ここでは画像を読まない
+            if parser.has_image() and not rig_plate_unchanged(parser, group, camera, compute_hash=False):
+                stale_cameras.append(camera)
+            elif parser.has_image():
+                log_message("Image unchanged, skipping extraction for: %s", "info", group)
+
+            self.camera, changes = update_camera_rig(parser, group, rotate_order)
+            self.group = group
+            log_message("Updated existing rig %s (%d attributes changed)", "info", group, len(changes))
+
+        if stale_cameras:
+            default_filename = os.path.splitext(os.path.basename(parser.filepath))[0] + ".jpg"
+            image_path = parser.choose_image_path(default_filename)
+            if image_path:
+                proxy_scale = list(PROXY_SCALES.values())[self.image_resolution.currentIndex()]
+                self.start_image_write(parser, image_path, stale_cameras, proxy_scale)
+
+        params = parser.state_data.get('cameraParameters', {})
+        if params:
+            self.update_camera_info(params, parser.get_camera_transform())
+        self.enable_offset_controls()
+
+    def on_auto_sync_toggled(self, checked):
+        """自動同期の開始と停止"""
+        if checked:
+            self.refresh_watched_files()
+        else:
+            self.file_watcher.stop()
+
+    def refresh_watched_files(self):
+        """シーン内のリグのソースファイルを監視対象にする"""
+        if self.auto_sync.isChecked():
+            self.file_watcher.set_paths(index_rigs_by_source().keys())
+
+    def on_watched_file_changed(self, path):
+        """監視中のファイルが更新されたら、そのファイルのみをバックグラウンドで解析し直す"""
+        # 画像のハッシュもワーカーで計算し、メインスレッドでは比較のみ行う
+        worker = ParseWorker(path, hash_image=True)
+        worker.signals.finished.connect(lambda parser: self.on_sync_parsed(worker, parser))
+        worker.signals.failed.connect(lambda error: self.on_sync_failed(worker, path, error))
+        self.sync_workers.add(worker)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def on_sync_failed(self, worker, path, error):
+        """再解析の失敗（保存途中など）はログのみ残し、次の変更を待つ"""
+        self.sync_workers.discard(worker)
+        log_message("Failed to re-parse %s: %s", "error", path, error)
+
+    def on_sync_parsed(self, worker, parser):
+        """再解析した内容で、同じファイルから生成したすべてのリグを更新する（メインスレッドで呼ばれる）"""
+        self.sync_workers.discard(worker)
+        if not self.auto_sync.isChecked():
+            return
+
+        state_hash = hash_state_data(parser.state_data)
+        plates = {}  # 書き出し先の画像のパス -> イメージプレーンを差し替えるカメラ
+        for group in find_rigs_for_source(parser.filepath):
+            camera = get_rig_camera(group)
+            if camera is None:
+                log_message("No camera found under rig %s, skipping sync", "info", group)
+                continue
+
+            # 画像は内容が変わった場合のみ書き出す（ハッシュは解析ワーカーで計算済み）
+            if parser.has_image() and not rig_plate_unchanged(parser, group, camera, compute_hash=False):
+                # 現在の画像はほかのリグと共有されていることがあるため上書きせず、
+                # ソースごとの名前で書き出して、このソースのリグだけを差し替える
+                current_path = get_rig_image_path(camera)
+                if current_path:
+                    image_dir = os.path.dirname(current_path)
+                    extension = os.path.splitext(current_path)[1] or ".jpg"
+                else:
+                    image_dir = get_default_image_dir()
+                    extension = ".jpg"
+                image_name = os.path.splitext(os.path.basename(parser.filepath))[0] + extension
+                plates.setdefault(os.path.join(image_dir, image_name), []).append(camera)
+
+            # 状態データが変わっていなければカメラの属性は比較しない
+            if _get_string_attr(group, RIG_STATE_HASH_ATTR) != state_hash:
+                update_camera_rig(parser, group)
+            log_message("Synced rig %s from: %s", "info", group, parser.filepath)
+
+        proxy_scale = list(PROXY_SCALES.values())[self.image_resolution.currentIndex()]
+        for image_path, cameras in plates.items():
+            # 同じ書き出し先のリグは1回の書き出しでまとめて差し替える
+            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            self.start_image_write(parser, image_path, cameras, proxy_scale)
+
+    def start_image_write(self, parser, image_path, cameras, proxy_scale=1.0):
+        """画像の書き出し（とプロキシ生成）をバックグラウンドで開始
+
+        cameras には書き出し後にイメージプレーンを差し替えるカメラのリストを渡す。
+        """
+        worker = ImageWriteWorker(parser, image_path, proxy_scale)
+        worker.signals.finished.connect(
+            lambda path, proxy_path: self.on_image_written(worker, parser, cameras, path, proxy_path)
+        )
+        worker.signals.failed.connect(lambda error: self.on_image_write_failed(worker, error))
+        self.image_workers.add(worker)
+        QtCore.QThreadPool.globalInstance().start(worker)
+        log_message("Writing image in background: %s", "info", image_path)
+
+    def on_image_written(self, worker, parser, cameras, image_path, proxy_path=""):
+        """画像の書き出し完了時にイメージプレーンを作成（メインスレッドで呼ばれる）"""
+        self.image_workers.discard(worker)
+        parser.image_path = image_path
+        log_message("Image saved to: %s", "info", image_path)
+        for camera in cameras:
+            if not cmds.objExists(camera):
+                log_message("Camera %s no longer exists, skipping image plane", "info", camera)
+                continue
+            try:
+                # 再インポート時は既存のイメージプレーンの画像を差し替える
+                replace_image_plane(camera, image_path, proxy_path or None)
+                record_rig_plate_hash(camera, parser.image_hash)
+            except Exception as e:
+                self.on_image_write_failed(None, str(e))
+
+    def toggle_image_resolution(self):
+        """選択中（なければ最後にインポートした）カメラのイメージプレーン解像度を切り替える"""
+        cameras = cmds.ls(selection=True, transforms=True) or ([self.camera] if self.camera else [])
+        for camera in cameras:
+            if cmds.objExists(camera):
+                toggle_image_plane_resolution(camera)
+
+    def on_image_write_failed(self, worker, error):
+        """画像の書き出し失敗をダイアログに表示（メインスレッドで呼ばれる）"""
+        self.image_workers.discard(worker)
+        log_message("Failed to save image: %s", "error", error)
+        QtWidgets.QMessageBox.warning(self, "Image Extraction Failed", f"Failed to save image:\n{error}")
+
+    def on_all_rigs_toggled(self, checked):
+        """複数リグモードではインポート前でもオフセットを操作できるようにする"""
+        if checked:
+            self.enable_offset_controls()
+
+    def schedule_up_axis(self):
+        """アップ軸の反映を遅延させ、連続した変更を1回の書き込みと1回のアンドゥにまとめる"""
+        if not self.group and not self.all_rigs.isChecked():
             return
+        if not self.up_axis_undo_open:
+            cmds.undoInfo(openChunk=True, chunkName="fspyAdjustUpAxis")
+            self.up_axis_undo_open = True
+        self.up_axis_timer.start()
+        self.up_axis_undo_timer.start()
+
+    def finish_up_axis_edit(self):
+        """保留中の変更を反映し、アンドゥチャンクを閉じる"""
+        if self.up_axis_timer.isActive():
+            self.up_axis_timer.stop()
+            self.apply_up_axis()
+        self.up_axis_undo_timer.stop()
+        if self.up_axis_undo_open:
+            cmds.undoInfo(closeChunk=True)
+            self.up_axis_undo_open = False
 
+    def apply_up_axis(self):
         up_axis = self.up_axis.currentText()
-        offset_value = 90
-
-        offset_x = self.offset_x.value()
-        offset_y = self.offset_y.value()
-        offset_z = self.offset_z.value()
-
-        if up_axis == "X":
-            cmds.setAttr(f"{self.group}.rotateX", offset_value + offset_x)
-            cmds.setAttr(f"{self.group}.rotateY", offset_y)
-            cmds.setAttr(f"{self.group}.rotateZ", offset_z)
-        elif up_axis == "Y":
-            cmds.setAttr(f"{self.group}.rotateX", offset_x)
-            cmds.setAttr(f"{self.group}.rotateY", offset_value + offset_y)
-            cmds.setAttr(f"{self.group}.rotateZ", offset_z)
-        elif up_axis == "Z":
-            cmds.setAttr(f"{self.group}.rotateX", offset_x)
-            cmds.setAttr(f"{self.group}.rotateY", offset_y)
-            cmds.setAttr(f"{self.group}.rotateZ", offset_value + offset_z)
-        elif up_axis == "-X":
-            cmds.setAttr(f"{self.group}.rotateX", -offset_value + offset_x)
-            cmds.setAttr(f"{self.group}.rotateY", offset_y)
-            cmds.setAttr(f"{self.group}.rotateZ", offset_z)
-        elif up_axis == "-Y":
-            cmds.setAttr(f"{self.group}.rotateX", offset_x)
-            cmds.setAttr(f"{self.group}.rotateY", -offset_value + offset_y)
-            cmds.setAttr(f"{self.group}.rotateZ", offset_z)
-        elif up_axis == "-Z":
-            cmds.setAttr(f"{self.group}.rotateX", offset_x)
-            cmds.setAttr(f"{self.group}.rotateY", offset_y)
-            cmds.setAttr(f"{self.group}.rotateZ", -offset_value + offset_z)
-
-
-        log_message(f"Set up axis: {up_axis}, offset value: {offset_value}", "info")
+        offset = (self.offset_x.value(), self.offset_y.value(), self.offset_z.value())
+
+        if self.all_rigs.isChecked():
+            # 選択中のリグにまとめて適用する（何も選択していない場合のみシーン内の全リグ）
+            if cmds.ls(selection=True):
+                groups = find_camera_rigs(selection_only=True)
+            else:
+                groups = find_camera_rigs()
+            if not groups:
+                log_message("No fSpy rigs in the selection", "info")
+                return
+            apply_up_axis_to_rigs(groups, up_axis, offset)
+            return
+
+        if not self.group or not cmds.objExists(self.group):
+            return
 
+        rotate_order = ROTATE_ORDERS[cmds.getAttr(f"{self.group}.rotateOrder")]
+
+        # 基底行列とオフセットを1つの行列に合成し、1回の書き込みで反映する
+        rotation = compose_up_axis_rotation(up_axis, offset, rotate_order)
+        set_group_rotation(self.group, rotation)
+
+        log_message("Set up axis: %s, offset: %s, rotation: %s", "info", up_axis, offset, rotation)
 
 def create_plugin_dialog():
     global dialog
@@ -589,23 +2259,642 @@ def create_plugin_dialog():
 
 def set_debug_level(trace=False, debug_flag=False):
     """デバッグレベルを設定"""
-    global DEBUG_LEVELS
-    DEBUG_LEVELS['trace'] = trace
-    DEBUG_LEVELS['debug'] = debug_flag
-    log_message(f"Debug levels set - trace: {trace}, debug: {debug_flag}", "info")
-
-def log_message(message, level):
-    """デバッグ情報を出力"""
-    if DEBUG_LEVELS.get(level, True):  # 未定義のレベルはデフォルトで表示
-        print(f'[{PLUGIN_NAME}] [{level.upper()}]: {message}')
+    if trace:
+        level = LOG_LEVELS['trace']
+    elif debug_flag:
+        level = LOG_LEVELS['debug']
+    else:
+        level = LOG_LEVELS['info']
+    logger.setLevel(level)
+    log_message("Debug levels set - trace: %s, debug: %s", "info", trace, debug_flag)
+
+def log_message(message, level, *args):
+    """デバッグ情報を出力
+
+    message は %-形式で、args は出力される場合にのみ整形される。
+    呼び出し可能なオブジェクトを渡すと、出力時にのみ呼び出して値を得る。
+    """
+    log_level = LOG_LEVELS.get(level, LOG_LEVELS['info'])  # 未定義のレベルは info として扱う
+    if not logger.isEnabledFor(log_level):
+        return
+    if args:
+        args = tuple(arg() if callable(arg) else arg for arg in args)
+    logger.log(log_level, message, *args)
 
 def launch_importer(trace=False, debug=False):
     """シェルフからの呼び出し用関数"""
     set_debug_level(trace, debug)
     create_plugin_dialog()
 
+def benchmark_matrix_backends(iterations=100000):
+    """Matrix3x3 と numpy の3x3行列演算（積・転置・逆行列）1回あたりの時間（秒）を計測する"""
+    rows = create_rotation_matrix(0.3, 0.7, -1.1, "xyz")
+    rows = [[float(rows[i, j]) for j in range(3)] for i in range(3)]
+
+    timings = {}
+    a = Matrix3x3(rows)
+    b = Matrix3x3(rows).transpose()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        a.dot(b).transpose().inverse()
+    timings['fallback'] = (time.perf_counter() - start) / iterations
+
+    if USE_NUMPY:
+        a = np.array(rows)
+        b = a.T
+        start = time.perf_counter()
+        for _ in range(iterations):
+            np.linalg.inv(a.dot(b).T)
+        timings['numpy'] = (time.perf_counter() - start) / iterations
+
+    for name, timing in timings.items():
+        log_message("Matrix backend '%s': %.3f us per operation", "info", name, timing * 1e6)
+    return timings
+
+
+class _CountingFile:
+    """読み込み回数を数えるファイルのラッパー（ネットワーク共有上の往復回数の代わり）
+
+    latency を指定すると、読み込みごとにその秒数だけ待つ。
+    """
+    def __init__(self, f, latency=0.0):
+        self.f = f
+        self.latency = latency
+        self.reads = 0
+
+    def _count(self):
+        self.reads += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def read(self, size=-1):
+        self._count()
+        return self.f.read(size)
+
+    def readinto(self, buffer):
+        self._count()
+        return self.f.readinto(buffer)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.f.close()
+
+
+def _parse_header_per_field(f):
+    """従来の読み方（フィールドごとに4バイトずつ読み、続けて状態データを読んでデコードする）"""
+    file_id = f.read(4)
+    version, state_size, image_size = (struct.unpack('<I', f.read(4))[0] for _ in range(3))
+    state_data = decode_state_data(f.read(state_size))
+    return file_id, version, state_size, image_size, state_data
+
+
+def _parse_header_coalesced(f, file_size):
+    """FSpyParser.parse と同じ読み方（ヘッダーと状態データの先頭をまとめて読んでデコードする）"""
+    prefix = _read_prefix(f, min(file_size, FSpyParser.HEADER_SIZE + STATE_PREFETCH_SIZE), FSpyParser.HEADER_SIZE)
+    file_id, version, state_size, image_size = struct.unpack_from('<4sIII', prefix)
+    state_data = decode_state_data(_read_region(f, prefix, FSpyParser.HEADER_SIZE, state_size))
+    return file_id, version, state_size, image_size, state_data
+
+
+def benchmark_parse_reads(filepath, iterations=100, latency=0.0):
+    """ヘッダーと状態データの読み込みについて、1回あたりの読み込み回数と時間（秒）を計測する
+
+    フィールドごとに読む従来の方法とまとめて読む現在の方法を、同じ処理
+    （ファイルを開き、読み込み、状態データをデコードする）で比較する。
+    あわせて FSpyParser.parse が実際に行う読み込み回数も 'parse' として記録する（時間は計測しない）。
+    latency を指定すると、読み込み1回ごとの往復遅延を模擬する。
+    """
+    class CountingParser(FSpyParser):
+        def open_file(self):
+            self.counting_file = _CountingFile(super(CountingParser, self).open_file(), latency)
+            return self.counting_file
+
+    file_size = os.path.getsize(filepath)
+    readers = {
+        'per_field': lambda f: _parse_header_per_field(f),
+        'coalesced': lambda f: _parse_header_coalesced(f, file_size),
+    }
+
+    results = {}
+    for name, read_header in readers.items():
+        reads = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with _CountingFile(open(filepath, 'rb', buffering=0), latency) as f:
+                read_header(f)
+            reads += f.reads
+        results[name] = (reads / iterations, (time.perf_counter() - start) / iterations)
+
+    # 計測中は解析ごとの info ログを出さない
+    level = logger.level
+    logger.setLevel(max(level, LOG_LEVELS['error']))
+    try:
+        parser = CountingParser(filepath, lazy=True)
+        parsed = parser.parse(use_cache=False)
+    finally:
+        logger.setLevel(level)
+    if not parsed:
+        raise parser.error
+    results['parse'] = (float(parser.counting_file.reads), None)
+
+    for name, (count, timing) in results.items():
+        if timing is None:
+            log_message("Header read '%s': %.1f reads", "info", name, count)
+        else:
+            log_message("Header read '%s': %.1f reads, %.3f ms per file", "info", name, count, timing * 1000)
+    return results
+
+
+def collect_fspy_files(paths):
+    """ファイルとディレクトリのリストから .fspy ファイルを列挙する"""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".fspy"):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+def hash_file(filepath):
+    """ファイル全体の SHA-1 をストリーミングで計算する"""
+    digest = hashlib.sha1()
+    buffer = bytearray(IMAGE_COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(filepath, 'rb') as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def get_default_index_path():
+    """Mayaプロジェクトの data フォルダにあるインデックスのパスを取得"""
+    project_path = cmds.workspace(query=True, rootDirectory=True)
+    return os.path.join(project_path, "data", INDEX_FILENAME)
+
+
+def _build_index_record(path, stat_result):
+    """ワーカー用: fSpy ファイルを解析してインデックスのレコードを作る（失敗した場合は例外を返す）"""
+    parser = FSpyParser(path, lazy=True)
+    if not parser.parse():
+        return parser.error
+
+    params = parser.state_data.get('cameraParameters', {})
+    solution = parser.get_camera_solution()
+    principal_point = params.get('principalPoint', [0, 0])
+    if isinstance(principal_point, dict):
+        principal_point = [principal_point.get('x', 0), principal_point.get('y', 0)]
+    horizontal_fov = params.get('horizontalFieldOfView')
+    translate = solution.translate or (None, None, None)
+    rotate = solution.rotate or (None, None, None)
+
+    return {
+        'path': path,
+        'mtime_ns': stat_result.st_mtime_ns,
+        'size': stat_result.st_size,
+        'file_hash': hash_file(path),
+        'image_width': params.get('imageWidth'),
+        'image_height': params.get('imageHeight'),
+        'horizontal_fov': math.degrees(horizontal_fov) if horizontal_fov is not None else None,
+        'focal_length': solution.focal_length,
+        'principal_x': principal_point[0],
+        'principal_y': principal_point[1],
+        'position_x': translate[0],
+        'position_y': translate[1],
+        'position_z': translate[2],
+        'rotation_x': rotate[0],
+        'rotation_y': rotate[1],
+        'rotation_z': rotate[2],
+        'indexed_at': time.time(),
+    }
+
+
+class FSpyIndex:
+    """fSpy プロジェクトのカメラ情報を SQLite に保存する永続インデックス
+
+    refresh() で更新日時とサイズが変わったファイルのみを再解析する。
+    """
+    COLUMNS = (
+        ('path', 'TEXT PRIMARY KEY'),
+        ('mtime_ns', 'INTEGER'),
+        ('size', 'INTEGER'),
+        ('file_hash', 'TEXT'),
+        ('image_width', 'REAL'),
+        ('image_height', 'REAL'),
+        ('horizontal_fov', 'REAL'),  # 度
+        ('focal_length', 'REAL'),  # mm
+        ('principal_x', 'REAL'),
+        ('principal_y', 'REAL'),
+        ('position_x', 'REAL'),
+        ('position_y', 'REAL'),
+        ('position_z', 'REAL'),
+        ('rotation_x', 'REAL'),  # 度 (XYZ)
+        ('rotation_y', 'REAL'),
+        ('rotation_z', 'REAL'),
+        ('indexed_at', 'REAL'),
+    )
+    COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = get_default_index_path()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path)
+        self._connection.row_factory = sqlite3.Row
+        columns = ", ".join(f"{name} {column_type}" for name, column_type in self.COLUMNS)
+        with self._connection:
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS cameras ({columns})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def refresh(self, paths, max_workers=None, prune=True):
+        """インデックスを更新し、(更新件数, 削除件数) を返す"""
+        known = {
+            row['path']: (row['mtime_ns'], row['size'])
+            for row in self._connection.execute("SELECT path, mtime_ns, size FROM cameras")
+        }
+
+        # 更新日時とサイズが変わったファイルのみを対象にする
+        changed = []
+        for path in collect_fspy_files(paths):
+            path = os.path.realpath(path)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (stat_result.st_mtime_ns, stat_result.st_size):
+                changed.append((path, stat_result))
+
+        records = []
+        invalid = 0  # 形式が不正なファイル
+        unreadable = 0  # 読み込みに失敗したファイル（次回の更新で再試行される）
+        if changed:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_build_index_record, path, stat_result) for path, stat_result in changed]
+                for future in futures:
+                    record = future.result()
+                    if isinstance(record, FSpyFormatError):
+                        invalid += 1
+                    elif isinstance(record, Exception):
+                        unreadable += 1
+                    elif record:
+                        records.append(record)
+
+        removed = []
+        if prune:
+            removed = [path for path in known if not os.path.exists(path)]
+
+        placeholders = ", ".join("?" for _ in self.COLUMN_NAMES)
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO cameras ({', '.join(self.COLUMN_NAMES)}) VALUES ({placeholders})",
+                [tuple(record[name] for name in self.COLUMN_NAMES) for record in records]
+            )
+            self._connection.executemany("DELETE FROM cameras WHERE path = ?", [(path,) for path in removed])
+
+        log_message(
+            "Index refreshed: %d updated, %d removed, %d invalid, %d unreadable (%s)", "info",
+            len(records), len(removed), invalid, unreadable, self.db_path
+        )
+        return len(records), len(removed)
+
+    def query(self, order_by='path', **filters):
+        """条件に一致するレコードを辞書のリストで返す
+
+        filters には列名をキーに、値（一致）または (最小, 最大) のタプル（範囲）を指定する。
+        例: index.query(focal_length=(30, 50), image_width=1920)
+        """
+        if order_by not in self.COLUMN_NAMES:
+            raise ValueError(f"Unknown column: {order_by}")
+
+        conditions = []
+        values = []
+        for name, value in filters.items():
+            if name not in self.COLUMN_NAMES:
+                raise ValueError(f"Unknown column: {name}")
+            if isinstance(value, (tuple, list)):
+                minimum, maximum = value
+                if minimum is not None:
+                    conditions.append(f"{name} >= ?")
+                    values.append(minimum)
+                if maximum is not None:
+                    conditions.append(f"{name} <= ?")
+                    values.append(maximum)
+            else:
+                conditions.append(f"{name} = ?")
+                values.append(value)
+
+        sql = "SELECT * FROM cameras"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order_by}"
+        return [dict(row) for row in self._connection.execute(sql, values)]
+
+
+def _parse_fspy_file(path, lazy=True):
+    """ワーカー用: fSpy ファイルを解析して (parser, 成否, 解析時間) を返す"""
+    start = time.perf_counter()
+    parser = FSpyParser(path, lazy=lazy)
+    parsed = parser.parse()
+    return parser, parsed, time.perf_counter() - start
+
+
+def _create_process_executor(max_workers):
+    """Maya 上でも動作するプロセスプールを生成する"""
+    import multiprocessing
+
+    # Maya GUI 内では sys.executable が maya.exe を指すため、子プロセスは mayapy で起動する
+    executable_name = os.path.basename(sys.executable).lower()
+    if executable_name.startswith("maya") and not executable_name.startswith("mayapy"):
+        mayapy = os.path.join(os.path.dirname(sys.executable), "mayapy")
+        if os.name == "nt":
+            mayapy += ".exe"
+        multiprocessing.set_executable(mayapy)
+
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def parse_fspy_files(paths, max_workers=None, use_processes=False, lazy=True):
+    """複数の fSpy ファイルを並列に解析し、入力順に (parser, 成否, 解析時間) を返すイテレータ
+
+    解析はワーカーで行い、結果は呼び出し元のスレッドで順に受け取る。
+    Maya のシーン編集はメインスレッドで行う必要があるため、cmds は呼ばないこと。
+    """
+    files = collect_fspy_files(paths)
+    if max_workers is not None and max_workers <= 1:
+        # 並列化しない
+        for path in files:
+            yield _parse_fspy_file(path, lazy)
+        return
+
+    if use_processes:
+        # 巨大なJSONを含む場合はGILを避けるためプロセスプールを使う
+        executor = _create_process_executor(max_workers)
+    else:
+        # 通常はI/O待ちが支配的なのでスレッドプールで十分
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    with executor:
+        futures = [executor.submit(_parse_fspy_file, path, lazy) for path in files]
+        try:
+            for future in futures:
+                parser, parsed, parse_time = future.result()
+                if use_processes and parsed:
+                    # 子プロセスのキャッシュは共有されないため、こちらにも登録する
+                    parse_cache.store(parser)
+                yield parser, parsed, parse_time
+        finally:
+            # 途中で中断された場合は未着手の解析を取り消す
+            for future in futures:
+                future.cancel()
+
+
+def _unique_image_names(files, extension):
+    """fSpy ファイルごとに、書き出す画像の重複しないファイル名を決める
+
+    ファイル名が同じで別のフォルダにあるものは親フォルダ名を付け、
+    それでも重なる場合は連番を付ける。同じファイルには同じ名前を返す。
+    """
+    bases = {}
+    for path in files:
+        base = os.path.splitext(os.path.basename(path))[0]
+        bases.setdefault(base, set()).add(os.path.realpath(path))
+
+    names = {}
+    used = set()
+    for path in files:
+        source = os.path.realpath(path)
+        if source in names:
+            continue
+        base = os.path.splitext(os.path.basename(path))[0]
+        if len(bases[base]) > 1:
+            base = f"{os.path.basename(os.path.dirname(source))}_{base}"
+        name = base + extension
+        index = 1
+        while name.lower() in used:
+            name = f"{base}_{index}{extension}"
+            index += 1
+        used.add(name.lower())
+        names[source] = name
+    return names
+
+
+def import_fspy_batch(paths, image_dir=None, extract_images=True, image_extension=".jpg",
+                      max_workers=None, use_processes=False, backend=None, rotate_order=None,
+                      proxy_scale=1.0, deduplicate=True, update_existing=False):
+    """複数の fSpy ファイルをUIなしで一括インポートし、ファイルごとの結果を返す
+
+    ファイルの解析はワーカーで並列に行い、リグの生成はメインスレッドで順に行う。
+    proxy_scale が 1 未満の場合は縮小したプロキシ画像をワーカーで生成し、
+    イメージプレーンはプロキシ画像を表示する。
+    deduplicate が True の場合、同じ内容の画像が書き出し済みであれば再利用する。
+    update_existing が True の場合、同じファイルから生成したリグは作り直さずに更新する。
+    """
+    if extract_images and image_dir is None:
+        image_dir = get_default_image_dir()
+    use_proxy = extract_images and proxy_scale < 1.0
+    proxy_executor = None
+    if use_proxy:
+        # parse_fspy_files と同様に、1以下の指定は直列（ワーカー1つ）として扱う
+        proxy_workers = None if max_workers is None else max(1, max_workers)
+        proxy_executor = concurrent.futures.ThreadPoolExecutor(max_workers=proxy_workers)
+    pending_planes = []  # (result, カメラ, 画像のハッシュ, プロキシ生成の future)
+
+    # シーン内のリグはファイルごとに探さず、最初に1回だけ索引を作る
+    existing_rigs = index_rigs_by_source() if update_existing else {}
+
+    # 同名のファイルが同じ画像ファイルを上書きし合わないよう、名前を先に決める
+    files = collect_fspy_files(paths)
+    image_names = _unique_image_names(files, image_extension)
+
+    results = []
+    batch_start = time.perf_counter()
+    # 画像は書き出し時にストリーミングするので遅延モードで解析
+    parsed_files = parse_fspy_files(files, max_workers=max_workers, use_processes=use_processes, lazy=True)
+    for parser, parsed, parse_time in parsed_files:
+        path = parser.filepath
+        result = {
+            'path': path,
+            'success': False,
+            'group': None,
+            'camera': None,
+            'image_path': None,
+            'parse_time': parse_time,
+            'import_time': 0.0,
+            'updated': False,
+            'invalid': False,  # fSpy ファイルの形式が不正（壊れている・途中で切れている）
+            'error': None,
+        }
+        results.append(result)
+        if not parsed:
+            result['error'] = str(parser.error or "Failed to parse fSpy file")
+            result['invalid'] = isinstance(parser.error, FSpyFormatError)
+            continue
+
+        start = time.perf_counter()
+        try:
+            # 同じファイルから生成したリグはすべて更新する（カメラが削除されたリグは除く）
+            rigs = [(group, get_rig_camera(group)) for group in existing_rigs.get(os.path.realpath(path), [])]
+            rigs = [(group, camera) for group, camera in rigs if camera]
+
+            image_path = None
+            if rigs and extract_images and all(rig_plate_unchanged(parser, group, camera) for group, camera in rigs):
+                # 画像が変わっていなければ書き出しもイメージプレーンの更新も行わない
+                log_message("Image unchanged, skipping extraction for: %s", "info", path)
+            elif extract_images and parser.has_image():
+                os.makedirs(image_dir, exist_ok=True)
+                image_path = os.path.join(image_dir, image_names[os.path.realpath(path)])
+                if deduplicate:
+                    image_path = write_image_deduplicated(parser, image_path)
+                else:
+                    parser.write_image(image_path)
+                parser.image_path = image_path
+                result['image_path'] = image_path
+
+            if rigs:
+                # 結果には最初のリグを記録する
+                result['group'], result['camera'] = rigs[0]
+                result['updated'] = True
+                proxy_future = None
+                if use_proxy and image_path:
+                    proxy_future = proxy_executor.submit(generate_proxy_image, image_path, proxy_scale)
+                for group, camera in rigs:
+                    update_camera_rig(parser, group, rotate_order)
+                    if proxy_future is not None:
+                        pending_planes.append((result, camera, parser.image_hash, proxy_future))
+                    elif image_path:
+                        replace_image_plane(camera, image_path)
+                        record_rig_plate_hash(camera, parser.image_hash)
+            elif use_proxy and image_path:
+                # イメージプレーンはプロキシ画像の生成後にまとめて作成する
+                result['group'], result['camera'] = create_camera_rig(parser, None, backend, rotate_order)
+                pending_planes.append((
+                    result, result['camera'], parser.image_hash,
+                    proxy_executor.submit(generate_proxy_image, image_path, proxy_scale)
+                ))
+            else:
+                result['group'], result['camera'] = create_camera_rig(parser, image_path, backend, rotate_order)
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            log_message("Failed to import %s: %s", "error", path, e)
+        result['import_time'] = time.perf_counter() - start
+
+        log_message(
+            "%s: parse %.3fs, import %.3fs, %s", "info",
+            os.path.basename(path), result['parse_time'], result['import_time'],
+            'OK' if result['success'] else 'FAILED'
+        )
+
+    if proxy_executor is not None:
+        with proxy_executor:
+            for result, camera, image_hash, future in pending_planes:
+                try:
+                    proxy_path = future.result()
+                except Exception as e:
+                    # プロキシが作れない場合はフル解像度の画像を使う
+                    proxy_path = None
+                    log_message("Failed to generate proxy for %s: %s", "error", result['path'], e)
+                try:
+                    replace_image_plane(camera, result['image_path'], proxy_path)
+                    record_rig_plate_hash(camera, image_hash)
+                except Exception as e:
+                    result['error'] = str(e)
+                    log_message("Failed to create image plane for %s: %s", "error", result['path'], e)
+
+    succeeded = sum(1 for result in results if result['success'])
+    log_message(
+        "Batch import finished: %d/%d succeeded in %.3fs", "info",
+        succeeded, len(results), time.perf_counter() - batch_start
+    )
+    return results
+
+
+def main(argv=None):
+    """mayapy から実行するためのコマンドラインエントリーポイント"""
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Import fSpy project files into Maya.")
+    arg_parser.add_argument("paths", nargs="+", help=".fspy files or directories containing them")
+    arg_parser.add_argument("--image-dir", help="directory for extracted images (default: <project>/images)")
+    arg_parser.add_argument("--no-images", action="store_true", help="do not extract images or create image planes")
+    arg_parser.add_argument("--workers", type=int, help="number of parallel parse workers")
+    arg_parser.add_argument("--processes", action="store_true", help="parse in a process pool instead of threads")
+    arg_parser.add_argument("--backend", choices=sorted(RIG_BACKENDS), help="rig creation backend")
+    arg_parser.add_argument("--rotate-order", choices=ROTATE_ORDERS, help="camera rotate order")
+    arg_parser.add_argument("--proxy", choices=sorted(PROXY_SCALES), default="full",
+                            help="image plane proxy resolution")
+    arg_parser.add_argument("--scene", help="open this scene before importing")
+    arg_parser.add_argument("--update-existing", action="store_true",
+                            help="update rigs previously imported from the same files instead of creating new ones")
+    arg_parser.add_argument("--save-scene", help="save the resulting scene to this path (.ma or .mb)")
+    arg_parser.add_argument("--trace", action="store_true", help="enable trace logs")
+    arg_parser.add_argument("--debug", action="store_true", help="enable debug logs")
+    args = arg_parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    try:
+        set_debug_level(args.trace, args.debug)
+        if args.scene:
+            cmds.file(args.scene, open=True, force=True)
+        results = import_fspy_batch(
+            args.paths,
+            image_dir=args.image_dir,
+            extract_images=not args.no_images,
+            max_workers=args.workers,
+            use_processes=args.processes,
+            backend=args.backend,
+            rotate_order=args.rotate_order,
+            proxy_scale=PROXY_SCALES[args.proxy],
+            update_existing=args.update_existing
+        )
+
+        if args.save_scene:
+            file_type = "mayaBinary" if args.save_scene.lower().endswith(".mb") else "mayaAscii"
+            cmds.file(rename=args.save_scene)
+            cmds.file(save=True, type=file_type)
+            log_message("Scene saved to: %s", "info", args.save_scene)
+    finally:
+        maya.standalone.uninitialize()
+
+    return 0 if all(result['success'] for result in results) else 1
+
+
 # シェルフボタンからの使用例:
 # import fspy_importer
 # fspy_importer.launch_importer(trace=True, debug=True)  # すべてのログを表示
 # または
-# fspy_importer.launch_importer()  # info と error のみ表示
\ No newline at end of file
+# fspy_importer.launch_importer()  # info と error のみ表示
+#
+# mayapy からの一括インポート:
+# mayapy fspy_importer.py shots/ --image-dir images --save-scene cameras.ma
+# fSpy で解き直したショットを既存のシーンに反映:
+# mayapy fspy_importer.py shots/ --scene cameras.ma --update-existing --save-scene cameras.ma
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Maya や Qt のない環境で実行できる fspy_importer のテスト
+
+maya.cmds は空のモジュールで代用する。
+    python -m unittest discover -s tests
+"""
+import importlib.util
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_PATH = os.path.join(ROOT, "fspy_importer.py")
+
+
+def _load_module(name, block_numpy=False):
+    """空の maya.cmds を用意して fspy_importer を読み込む"""
+    maya = types.ModuleType("maya")
+    maya.cmds = types.ModuleType("maya.cmds")
+    modules = {"maya": maya, "maya.cmds": maya.cmds}
+    if block_numpy:
+        modules["numpy"] = None
+    with mock.patch.dict(sys.modules, modules):
+        spec = importlib.util.spec_from_file_location(name, MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    module.logger.setLevel("ERROR")
+    return module
+
+
+fspy_importer = _load_module("fspy_importer_under_test")
+fspy_fallback = _load_module("fspy_importer_fallback", block_numpy=True)
+
+STATE = {
+    'cameraParameters': {
+        'imageWidth': 1920,
+        'imageHeight': 1080,
+        'horizontalFieldOfView': 1.0,
+        'principalPoint': [0.1, -0.05],
+        'cameraTransform': {
+            'rows': [[0.8, -0.6, 0, 1], [0.6, 0.8, 0, 2], [0, 0, 1, 3], [0, 0, 0, 1]]
+        },
+    }
+}
+
+
+def write_fspy(path, state, image=b"\x89PNG" + b"x" * 64):
+    """テスト用の .fspy ファイルを書き出す"""
+    state_bytes = json.dumps(state).encode("utf-8") + b"\x00" * 3
+    with open(path, "wb") as f:
+        f.write(b"fspy" + struct.pack("<III", 1, len(state_bytes), len(image)))
+        f.write(state_bytes)
+        f.write(image)
+
+
+class CameraSolutionTest(unittest.TestCase):
+    def test_solve_without_maya_or_qt(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "shot.fspy")
+            write_fspy(path, STATE)
+            parser = fspy_importer.FSpyParser(path, lazy=True)
+            self.assertTrue(parser.parse(use_cache=False), parser.error)
+            solution = fspy_importer.CameraSolution(parser.state_data)
+
+        self.assertEqual(solution.translate, (1, 2, 3))
+        self.assertAlmostEqual(solution.rotate[2], math.degrees(math.atan2(0.6, 0.8)))
+        self.assertAlmostEqual(solution.focal_length, 18.0 / math.tan(0.5))
+        self.assertAlmostEqual(solution.horizontal_film_aperture, 36.0 * fspy_importer.MM_TO_INCH)
+        self.assertEqual(solution.film_fit, fspy_importer.FILM_FIT_HORIZONTAL)
+
+
+class ParseErrorTest(unittest.TestCase):
+    def test_truncated_file_reports_format_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "truncated.fspy")
+            write_fspy(path, STATE)
+            with open(path, "r+b") as f:
+                f.truncate(40)
+            parser = fspy_importer.FSpyParser(path)
+            self.assertFalse(parser.parse(use_cache=False))
+        self.assertIsInstance(parser.error, fspy_importer.FSpyFormatError)
+
+    def test_missing_file_reports_os_error(self):
+        parser = fspy_importer.FSpyParser(os.path.join(ROOT, "missing.fspy"))
+        self.assertFalse(parser.parse(use_cache=False))
+        self.assertIsInstance(parser.error, OSError)
+
+
+class EulerRoundTripTest(unittest.TestCase):
+    ANGLES = (0.3, -0.7, 1.1)
+
+    def assert_round_trip(self, module):
+        for order in module.ROTATE_ORDERS:
+            with self.subTest(order=order, numpy=module.USE_NUMPY):
+                matrix = module.create_rotation_matrix(*self.ANGLES, rotate_order=order)
+                euler = module.rotation_matrix_to_euler(matrix, order)
+                for angle, expected in zip(euler, self.ANGLES):
+                    self.assertAlmostEqual(angle, expected)
+
+    @unittest.skipUnless(fspy_importer.USE_NUMPY, "numpy is not installed")
+    def test_round_trip_numpy(self):
+        self.assert_round_trip(fspy_importer)
+
+    def test_round_trip_fallback(self):
+        self.assertFalse(fspy_fallback.USE_NUMPY)
+        self.assert_round_trip(fspy_fallback)
+
+
+def make_openmaya_stand_in():
+    """_create_rig_openmaya が使う範囲の maya.api.OpenMaya を模した記録用モジュール"""
+    om = types.ModuleType("OpenMaya")
+    om.calls = []
+    om.nodes = []
+
+    class Node:
+        def __init__(self, node_type, parent):
+            self.node_type = node_type
+            self.parent = parent
+            self.name = None
+
+    class Plug:
+        isLocked = False
+
+    class MDagModifier:
+        def createNode(self, node_type, parent):
+            node = Node(node_type, parent)
+            om.nodes.append(node)
+            return node
+
+        def renameNode(self, node, name):
+            node.name = name
+
+        def doIt(self):
+            om.calls.append("doIt")
+
+    class MFnTransform:
+        def __init__(self, node):
+            self.node = node
+            self.plugs = {}
+
+        def setTranslation(self, vector, space):
+            om.calls.append(("translate", vector))
+
+        def setRotationOrder(self, order, reorder):
+            om.calls.append(("rotateOrder", order))
+
+        def setRotation(self, rotation, space):
+            om.calls.append(("rotate", rotation.angles))
+
+        def findPlug(self, name, want_networked):
+            return self.plugs.setdefault(name, Plug())
+
+        def partialPathName(self):
+            return self.node.name
+
+    class MEulerRotation:
+        def __init__(self, x, y, z, order):
+            self.angles = (x, y, z)
+
+    class MFnCamera:
+        def __init__(self, node):
+            self.node = node
+
+    for order in ("XYZ", "YZX", "ZXY", "XZY", "YXZ", "ZYX"):
+        setattr(MEulerRotation, "k" + order, order)
+    om.MObject = types.SimpleNamespace(kNullObj=None)
+    om.MSpace = types.SimpleNamespace(kTransform="transform")
+    om.MTransformationMatrix = MEulerRotation
+    om.MDagModifier = MDagModifier
+    om.MFnTransform = MFnTransform
+    om.MFnDagNode = MFnTransform
+    om.MFnCamera = MFnCamera
+    om.MEulerRotation = MEulerRotation
+    om.MVector = lambda *values: values
+    return om
+
+
+class OpenMayaBackendTest(unittest.TestCase):
+    def test_create_rig_with_stand_in(self):
+        om = make_openmaya_stand_in()
+        solution = fspy_importer.CameraSolution(STATE, "zxy")
+        group, camera = fspy_importer._create_rig_openmaya(solution, om=om)
+
+        self.assertEqual((group, camera), (fspy_importer.RIG_GROUP_NAME, "fspy_camera"))
+        self.assertEqual(om.calls.count("doIt"), 1)
+        self.assertEqual(
+            [(node.node_type, node.name) for node in om.nodes],
+            [("transform", "fspy_camera_group"), ("transform", "fspy_camera"), ("camera", "fspy_cameraShape")]
+        )
+        # カメラはグループの子、シェイプはカメラの子として生成される
+        self.assertIs(om.nodes[1].parent, om.nodes[0])
+        self.assertIs(om.nodes[2].parent, om.nodes[1])
+        self.assertIn(("rotateOrder", "ZXY"), om.calls)
+        self.assertIn(("translate", (1, 2, 3)), om.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()